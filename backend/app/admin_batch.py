@@ -1,8 +1,16 @@
-import re
-from typing import Dict, Iterable, List, Optional, Tuple
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.df_utils import alnum_lower
+
 ACCOUNT_ID_SYNONYMS = [
     "account id",
     "account_id",
@@ -21,28 +29,54 @@ USER_ID_SYNONYMS = [
     "user code",
 ]
 
+ADMIN_BATCH_WORKERS_ENV = "ADMIN_BATCH_WORKERS"
+
+_ACCOUNT_POOL: Optional[ProcessPoolExecutor] = None
+_ACCOUNT_POOL_WORKERS = 0
+_ACCOUNT_POOL_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=512, typed=True)
 def normalize_col(value: object) -> str:
-    text = str(value or "").strip().lower()
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value or ""))
+
+
+_ACCOUNT_ID_KEYS = [normalize_col(name) for name in ACCOUNT_ID_SYNONYMS]
+_USER_ID_KEYS = [normalize_col(name) for name in USER_ID_SYNONYMS]
 
 
 def find_column(df: pd.DataFrame, candidates: Iterable[str]) -> Optional[str]:
     if df is None:
         return None
-    normalized_candidates = [normalize_col(name) for name in candidates]
-    normalized_cols = [(normalize_col(col), col) for col in df.columns]
+    return _find_in_lookup(
+        _column_lookup(df), [normalize_col(name) for name in candidates]
+    )
+
+
+def _column_lookup(df: Optional[pd.DataFrame]) -> Dict[str, str]:
+    lookup: Dict[str, str] = {}
+    if df is None:
+        return lookup
+    for col in df.columns:
+        lookup.setdefault(normalize_col(col), col)
+    return lookup
+
+
+def _find_in_lookup(lookup: Dict[str, str], normalized_candidates: Iterable[str]) -> Optional[str]:
     for candidate in normalized_candidates:
-        for normalized, original in normalized_cols:
-            if normalized == candidate:
-                return original
+        original = lookup.get(candidate)
+        if original is not None:
+            return original
     return None
 
 
 def resolve_group_columns(day_df: pd.DataFrame, net_df: pd.DataFrame) -> Dict[str, Optional[str]]:
-    day_account = find_column(day_df, ACCOUNT_ID_SYNONYMS)
-    net_account = find_column(net_df, ACCOUNT_ID_SYNONYMS)
-    day_user = find_column(day_df, USER_ID_SYNONYMS)
-    net_user = find_column(net_df, USER_ID_SYNONYMS)
+    day_lookup = _column_lookup(day_df)
+    net_lookup = _column_lookup(net_df)
+    day_account = _find_in_lookup(day_lookup, _ACCOUNT_ID_KEYS)
+    net_account = _find_in_lookup(net_lookup, _ACCOUNT_ID_KEYS)
+    day_user = _find_in_lookup(day_lookup, _USER_ID_KEYS)
+    net_user = _find_in_lookup(net_lookup, _USER_ID_KEYS)
     net_has_columns = net_df is not None and len(getattr(net_df, "columns", [])) > 0
 
     if day_account and (net_account or not net_has_columns):
@@ -69,7 +103,7 @@ def extract_group_indices(
     day_user_col: Optional[str],
     net_account_col: Optional[str],
     net_user_col: Optional[str],
-) -> Tuple[Dict[str, pd.Index], Dict[str, pd.Index], int, int]:
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], int, int]:
     day_groups, day_missing = _build_group_indices(
         day_df,
         group_key,
@@ -85,13 +119,24 @@ def extract_group_indices(
     return day_groups, net_groups, day_missing, net_missing
 
 
+_NULL_KEY_TOKENS = frozenset({"", "nan", "none", "null"})
+
+
 def _normalize_series(series: pd.Series) -> pd.Series:
-    cleaned = series.where(series.notna(), "")
-    cleaned = cleaned.astype(str).str.strip()
-    cleaned = cleaned.where(
-        ~cleaned.str.lower().isin({"nan", "none", "null"}), ""
+    values = series.to_numpy(dtype=object)
+    return pd.Series(
+        [_normalize_key(value) for value in values], index=series.index, dtype=object
     )
-    return cleaned
+
+
+def _normalize_key(value: object) -> str:
+    if isinstance(value, str):
+        text = value.strip()
+    elif value is None or pd.isna(value):
+        return ""
+    else:
+        text = str(value).strip()
+    return "" if text.lower() in _NULL_KEY_TOKENS else text
 
 
 def _build_group_indices(
@@ -99,7 +144,7 @@ def _build_group_indices(
     group_key: str,
     account_col: Optional[str],
     user_col: Optional[str],
-) -> Tuple[Dict[str, pd.Index], int]:
+) -> Tuple[Dict[str, np.ndarray], int]:
     if df.empty and not account_col and not user_col:
         return {}, 0
 
@@ -119,15 +164,115 @@ def _build_group_indices(
         missing_mask = key_series == ""
 
     missing_count = int(missing_mask.sum())
-    valid_df = df.loc[~missing_mask]
-    valid_keys = key_series.loc[~missing_mask]
-    groups = valid_df.groupby(valid_keys, sort=False).groups
-    return {str(key).strip(): indices for key, indices in groups.items()}, missing_count
+    valid_positions = np.flatnonzero(~missing_mask.to_numpy())
+    codes, uniques = pd.factorize(
+        key_series.to_numpy(dtype=object)[valid_positions], sort=False
+    )
+    if len(uniques) == 0:
+        return {}, missing_count
+
+    # Row positions (not labels) so callers slice with df.take; the stable sort
+    # keeps each group's rows in original order.
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    positions = np.split(valid_positions[order], boundaries)
+    return {str(key).strip(): rows for key, rows in zip(uniques, positions)}, missing_count
+
+
+def daywise_only_keys(day_groups: Dict[str, np.ndarray], net_groups: Dict[str, np.ndarray]) -> List[str]:
+    return _sorted_key_difference(day_groups, net_groups)
+
+
+def netwise_only_keys(day_groups: Dict[str, np.ndarray], net_groups: Dict[str, np.ndarray]) -> List[str]:
+    return _sorted_key_difference(net_groups, day_groups)
+
+
+def _sorted_key_difference(left: Dict[str, np.ndarray], right: Dict[str, np.ndarray]) -> List[str]:
+    # setdiff1d only sorts when assume_unique is False; dict keys are unique anyway.
+    return np.setdiff1d(
+        np.fromiter(left.keys(), dtype=object, count=len(left)),
+        np.fromiter(right.keys(), dtype=object, count=len(right)),
+    ).tolist()
+
+
+def admin_batch_workers() -> int:
+    """Worker processes for per-account admin work; 1 (the default) runs in-process."""
+    raw = os.getenv(ADMIN_BATCH_WORKERS_ENV, "").strip()
+    try:
+        workers = int(raw) if raw else 1
+    except ValueError:
+        return 1
+    return max(1, workers)
+
+
+def map_accounts(
+    func: Callable[..., Any],
+    jobs: Dict[str, Tuple],
+    max_workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run func(*args) for every account job, keyed like jobs.
+
+    An exception raised for one account is returned as that account's result so
+    the rest of the batch still completes. With max_workers > 1 the jobs run in
+    a process pool, so func and its arguments must be picklable. If a worker
+    process dies, the accounts left unfinished get the BrokenProcessPool error
+    as their result and the pool is rebuilt on the next call.
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return {key: _run_account_job(func, args) for key, args in jobs.items()}
+
+    executor = _account_pool(max_workers)
+    futures = {
+        key: executor.submit(_run_account_job, func, args) for key, args in jobs.items()
+    }
+    results: Dict[str, Any] = {}
+    pool_broken = False
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except BrokenProcessPool as exc:
+            # Keep the accounts that finished; the rest fail like any other account.
+            results[key] = exc
+            pool_broken = True
+    if pool_broken:
+        shutdown_account_pool()
+    return results
+
+
+def _account_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Pool shared by admin batches, so worker processes are started only once."""
+    global _ACCOUNT_POOL, _ACCOUNT_POOL_WORKERS
+    with _ACCOUNT_POOL_LOCK:
+        if _ACCOUNT_POOL is None or _ACCOUNT_POOL_WORKERS != max_workers:
+            if _ACCOUNT_POOL is not None:
+                _ACCOUNT_POOL.shutdown(wait=False)
+            # Forking the threaded server process can copy a held lock into the
+            # child, so workers start from a clean forkserver (spawn elsewhere).
+            _ACCOUNT_POOL = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=_pool_context()
+            )
+            _ACCOUNT_POOL_WORKERS = max_workers
+        return _ACCOUNT_POOL
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
 
 
-def daywise_only_keys(day_groups: Dict[str, pd.Index], net_groups: Dict[str, pd.Index]) -> List[str]:
-    return sorted(set(day_groups.keys()) - set(net_groups.keys()))
+def shutdown_account_pool() -> None:
+    global _ACCOUNT_POOL, _ACCOUNT_POOL_WORKERS
+    with _ACCOUNT_POOL_LOCK:
+        if _ACCOUNT_POOL is not None:
+            _ACCOUNT_POOL.shutdown(wait=False, cancel_futures=True)
+        _ACCOUNT_POOL = None
+        _ACCOUNT_POOL_WORKERS = 0
 
 
-def netwise_only_keys(day_groups: Dict[str, pd.Index], net_groups: Dict[str, pd.Index]) -> List[str]:
-    return sorted(set(net_groups.keys()) - set(day_groups.keys()))
+def _run_account_job(func: Callable[..., Any], args: Tuple) -> Any:
+    try:
+        return func(*args)
+    except Exception as exc:
+        return exc
@@ -1,8 +1,19 @@
 import re
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+_SEGMENT_ALIASES = {"NFO": "NFO", "NSEFO": "NFO", "BFO": "BFO", "BSEFO": "BFO"}
+_OPTION_SYMBOL_PATTERN = re.compile(r"\b(?:CE|PE)\b")
+_TURNOVER_GROUPS = (
+    ("NFO", "futures"),
+    ("NFO", "options"),
+    ("BFO", "futures"),
+    ("BFO", "options"),
+)
+_ASSIGNMENT_PATTERN = re.compile(r"(?:EXE|EXERCISE|ASSIGN)", re.IGNORECASE)
+
 
 def compute_charges(
     day_df: pd.DataFrame,
@@ -18,9 +29,10 @@ def compute_charges(
         turnover_bases,
         segment_defaults,
         instrument_debug,
-    ) = _compute_turnover_bases(day_df)
+    ) = _compute_turnover_bases(day_df, debug=debug)
 
     rules_map = {rule["key"]: rule for rule in rate_card.get("rules", [])}
+    rate_pairs = _rate_pairs(rules_map)
 
     nfo_rule_keys = {
         "turnover": "NSE_TURNOVER",
@@ -37,8 +49,13 @@ def compute_charges(
         "stamp": "BSE_STAMPDUTY",
     }
 
-    nfo_amounts = _segment_amounts(segment_bases["NFO"], rules_map, nfo_rule_keys)
-    bfo_amounts = _segment_amounts(segment_bases["BFO"], rules_map, bfo_rule_keys)
+    # Charges are reported as magnitudes; take abs() once and reuse everywhere below.
+    nfo_amounts = _abs_values(
+        _segment_amounts(segment_bases["NFO"], rate_pairs, nfo_rule_keys)
+    )
+    bfo_amounts = _abs_values(
+        _segment_amounts(segment_bases["BFO"], rate_pairs, bfo_rule_keys)
+    )
 
     total_futures_turnover = (
         segment_bases["NFO"]["futures_buy"]
@@ -52,14 +69,18 @@ def compute_charges(
         + segment_bases["BFO"]["options_buy"]
         + segment_bases["BFO"]["options_sell"]
     )
-    ipft_amount = _apply_rates(
-        total_futures_turnover, total_options_turnover, rules_map.get("IPFT")
+    ipft_amount = abs(
+        _apply_rates(
+            total_futures_turnover, total_options_turnover, rate_pairs.get("IPFT")
+        )
     )
 
-    _validate_toc_rates("NFO", segment_bases["NFO"], rules_map.get("NSE_TURNOVER"))
-    _validate_toc_rates("BFO", segment_bases["BFO"], rules_map.get("BSE_TURNOVER"))
+    _validate_toc_rates("NFO", segment_bases["NFO"], rate_pairs.get("NSE_TURNOVER"))
+    _validate_toc_rates("BFO", segment_bases["BFO"], rate_pairs.get("BSE_TURNOVER"))
 
-    assignment_result = _compute_assignment_stt(netwise_df, rules_map)
+    assignment_result = _compute_assignment_stt(netwise_df, rules_map, debug=debug)
+    assignment_nfo = abs(assignment_result["nfo_amount"])
+    assignment_bfo = abs(assignment_result["bfo_amount"])
 
     rounding_debug: List[Dict] = []
     expense_lines: List[Dict] = []
@@ -94,45 +115,43 @@ def compute_charges(
         add_line(
             "NFO_STT_ASSIGNMENT",
             "NFO Assignment/Exercise STT",
-            assignment_result["nfo_amount"],
+            assignment_nfo,
             False,
         )
     if assignment_result["bfo_amount"] > 0:
         add_line(
             "BFO_STT_ASSIGNMENT",
             "BFO Assignment/Exercise STT",
-            assignment_result["bfo_amount"],
+            assignment_bfo,
             False,
         )
 
     # ---- Aggregate-then-round bill lines to match PDF ----
-    toc_nse = _round_to(abs(nfo_amounts["turnover"]), 2)
-    toc_bse = _round_to(abs(bfo_amounts["turnover"]), 2)
-
-    raw_clearing = (
-        abs(nfo_amounts["clearing"])
-        + abs(bfo_amounts["clearing"])
-        + abs(float(expiry_lot_fee))
-    )
-    raw_sebi = abs(nfo_amounts["sebi"]) + abs(bfo_amounts["sebi"])
-    raw_stamp = abs(nfo_amounts["stamp"]) + abs(bfo_amounts["stamp"])
-    raw_ipft = abs(ipft_amount)
-    raw_stt = (
-        abs(nfo_amounts["stt"])
-        + abs(bfo_amounts["stt"])
-        + abs(assignment_result["nfo_amount"])
-        + abs(assignment_result["bfo_amount"])
-    )
-
-    clearing_total = _round_to(raw_clearing, 2)
-    sebi_total = _round_to(raw_sebi, 2)
-    stamp_total = _round_to(raw_stamp, 2)
-    ipft_total = _round_to(raw_ipft, 2)
-    stt_total = _round_to(raw_stt, 0)
+    raw_totals = {
+        "toc_nse": nfo_amounts["turnover"],
+        "toc_bse": bfo_amounts["turnover"],
+        "clearing": (
+            nfo_amounts["clearing"]
+            + bfo_amounts["clearing"]
+            + abs(float(expiry_lot_fee))
+        ),
+        "sebi": nfo_amounts["sebi"] + bfo_amounts["sebi"],
+        "ipft": ipft_amount,
+        "stt": (
+            nfo_amounts["stt"]
+            + bfo_amounts["stt"]
+            + assignment_nfo
+            + assignment_bfo
+        ),
+        "stamp": nfo_amounts["stamp"] + bfo_amounts["stamp"],
+    }
+    rounded_totals = {
+        name: _round_to(value, _BILL_DECIMALS.get(name, 2))
+        for name, value in raw_totals.items()
+    }
 
-    gst_base = _round2(toc_nse + toc_bse + clearing_total + sebi_total + ipft_total)
-    cgst = _round2(gst_base * 0.09)
-    sgst = _round2(gst_base * 0.09)
+    gst_base = _round2(sum(rounded_totals[name] for name in _GST_BASE_TOTALS))
+    cgst = sgst = _round2(gst_base * 0.09)
     gst_total = _round2(cgst + sgst)
 
     gst_lines = [
@@ -141,13 +160,13 @@ def compute_charges(
     ]
 
     bill_lines = [
-        _bill_line("TOC_NSE", "TOC NSE Exchange", toc_nse),
-        _bill_line("TOC_BSE", "TOC BSE Exchange", toc_bse),
-        _bill_line("CLEARING", "Clearing Charges", clearing_total),
-        _bill_line("SEBI", "SEBI Fees", sebi_total),
-        _bill_line("IPFT", "IPFT Charges", ipft_total),
-        _bill_line("STT", "STT", stt_total),
-        _bill_line("STAMP_DUTY", "Stamp Duty", stamp_total),
+        _bill_line("TOC_NSE", "TOC NSE Exchange", rounded_totals["toc_nse"]),
+        _bill_line("TOC_BSE", "TOC BSE Exchange", rounded_totals["toc_bse"]),
+        _bill_line("CLEARING", "Clearing Charges", rounded_totals["clearing"]),
+        _bill_line("SEBI", "SEBI Fees", rounded_totals["sebi"]),
+        _bill_line("IPFT", "IPFT Charges", rounded_totals["ipft"]),
+        _bill_line("STT", "STT", rounded_totals["stt"]),
+        _bill_line("STAMP_DUTY", "Stamp Duty", rounded_totals["stamp"]),
         _bill_line("CGST_9", "CGST @ 9%", cgst),
         _bill_line("SGST_9", "SGST @ 9%", sgst),
     ]
@@ -173,31 +192,20 @@ def compute_charges(
     debug_payload = {
         "rounding_policy": "Option A",
         "stt_rounding": "nearest_rupee_round",
-        "turnover_bases": turnover_bases,
     }
 
     if debug:
         debug_payload.update(
             {
+                "turnover_bases": turnover_bases,
                 "expiry_settlement_total": _round2(float(expiry_settlement_total)),
                 "expiry_lot_fee": _round2(float(expiry_lot_fee)),
                 "bill_aggregation": {
                     "raw": {
-                        "clearing": _round6(raw_clearing),
-                        "sebi": _round6(raw_sebi),
-                        "ipft": _round6(raw_ipft),
-                        "stt": _round6(raw_stt),
-                        "stamp": _round6(raw_stamp),
-                    },
-                    "rounded": {
-                        "toc_nse": toc_nse,
-                        "toc_bse": toc_bse,
-                        "clearing": clearing_total,
-                        "sebi": sebi_total,
-                        "ipft": ipft_total,
-                        "stt": stt_total,
-                        "stamp": stamp_total,
+                        name: _round6(raw_totals[name])
+                        for name in ("clearing", "sebi", "ipft", "stt", "stamp")
                     },
+                    "rounded": rounded_totals,
                     "gst_base": gst_base,
                 },
                 "line_rounding": rounding_debug,
@@ -215,7 +223,9 @@ def compute_charges(
 
 
 def _segment_amounts(
-    bases: Dict[str, float], rules_map: Dict[str, Dict], rule_keys: Dict[str, str]
+    bases: Dict[str, float],
+    rate_pairs: Dict[str, Tuple[float, float]],
+    rule_keys: Dict[str, str],
 ) -> Dict[str, float]:
     futures_turnover = bases["futures_buy"] + bases["futures_sell"]
     options_turnover = bases["options_buy"] + bases["options_sell"]
@@ -226,19 +236,19 @@ def _segment_amounts(
     sell_value_opt = bases["options_sell"]
 
     turnover_amount = _apply_rates(
-        futures_turnover, options_turnover, rules_map.get(rule_keys["turnover"])
+        futures_turnover, options_turnover, rate_pairs.get(rule_keys["turnover"])
     )
     clearing_amount = _apply_rates(
-        futures_turnover, options_turnover, rules_map.get(rule_keys["clearing"])
+        futures_turnover, options_turnover, rate_pairs.get(rule_keys["clearing"])
     )
     sebi_amount = _apply_rates(
-        futures_turnover, options_turnover, rules_map.get(rule_keys["sebi"])
+        futures_turnover, options_turnover, rate_pairs.get(rule_keys["sebi"])
     )
     stt_amount = _apply_rates(
-        sell_value_fut, sell_value_opt, rules_map.get(rule_keys["stt"])
+        sell_value_fut, sell_value_opt, rate_pairs.get(rule_keys["stt"])
     )
     stamp_amount = _apply_rates(
-        buy_value_fut, buy_value_opt, rules_map.get(rule_keys["stamp"])
+        buy_value_fut, buy_value_opt, rate_pairs.get(rule_keys["stamp"])
     )
 
     return {
@@ -250,49 +260,75 @@ def _segment_amounts(
     }
 
 
-def _apply_rates(futures_base: float, options_base: float, rule: Optional[Dict]) -> float:
-    if not rule:
+def _abs_values(amounts: Dict[str, float]) -> Dict[str, float]:
+    return {name: abs(value) for name, value in amounts.items()}
+
+
+def _rate_pairs(rules_map: Dict[str, Dict]) -> Dict[str, Tuple[float, float]]:
+    pairs: Dict[str, Tuple[float, float]] = {}
+    for key, rule in rules_map.items():
+        if not rule:
+            continue
+        rates = rule.get("rates", {})
+        pairs[key] = (
+            eff(rates.get("futures", 0) or 0),
+            eff(rates.get("options", 0) or 0),
+        )
+    return pairs
+
+
+def _apply_rates(
+    futures_base: float, options_base: float, rates: Optional[Tuple[float, float]]
+) -> float:
+    if rates is None:
         return 0.0
-    rates = rule.get("rates", {})
-    futures_rate = eff(rates.get("futures", 0) or 0)
-    options_rate = eff(rates.get("options", 0) or 0)
+    futures_rate, options_rate = rates
     return (futures_base * futures_rate) + (options_base * options_rate)
 
 
 def _compute_turnover_bases(
-    day_df: pd.DataFrame,
+    day_df: pd.DataFrame, *, debug: bool = False
 ) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]], Dict, Dict]:
     segment_bases = {
         "NFO": _init_segment_bases(),
         "BFO": _init_segment_bases(),
     }
+    segments = _segment_series(day_df)
+    instruments = _instrument_series(day_df)
+
+    # Blank segments count as NFO, so group codes index _TURNOVER_GROUPS directly.
+    group_codes = (segments == "BFO").to_numpy(dtype=np.int8) * 2 + (
+        instruments == "options"
+    ).to_numpy(dtype=np.int8)
+    if group_codes.size:
+        order = np.argsort(group_codes, kind="stable")
+        sorted_codes = group_codes[order]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+        buy_values = _numeric_column(day_df, "Actual Buy Value").to_numpy()[order]
+        sell_values = _numeric_column(day_df, "Actual Sell Value").to_numpy()[order]
+        buy_sums = np.add.reduceat(buy_values, bounds)
+        sell_sums = np.add.reduceat(sell_values, bounds)
+        for code, buy_total, sell_total in zip(sorted_codes[bounds], buy_sums, sell_sums):
+            segment, instrument = _TURNOVER_GROUPS[code]
+            segment_bases[segment][f"{instrument}_buy"] += float(buy_total)
+            segment_bases[segment][f"{instrument}_sell"] += float(sell_total)
+
+    if not debug:
+        return segment_bases, {}, {}, {}
+
     defaulted_rows: List[Dict] = []
+    defaulted_mask = segments.isna()
+    for position in np.flatnonzero(defaulted_mask.to_numpy())[:10]:
+        row = day_df.iloc[position]
+        defaulted_rows.append(
+            _default_debug(row, day_df.index[position], "NFO", row.get("Exchg.Seg", ""))
+        )
     instrument_debug = {
-        "options": 0,
-        "futures": 0,
+        "options": int((instruments == "options").sum()),
+        "futures": int((instruments == "futures").sum()),
         "note": "Instrument type inferred from TradingSymbol (CE/PE => options).",
     }
 
-    for idx, row in day_df.iterrows():
-        original_seg = row.get("Exchg.Seg", "")
-        segment = normalize_segment(original_seg)
-        if segment is None:
-            segment = "NFO"
-            defaulted_rows.append(_default_debug(row, idx, segment, original_seg))
-
-        instrument = _classify_instrument(row)
-        instrument_debug[instrument] += 1
-
-        buy_value = _to_float(row.get("Actual Buy Value", 0))
-        sell_value = _to_float(row.get("Actual Sell Value", 0))
-
-        if instrument == "options":
-            segment_bases[segment]["options_buy"] += buy_value
-            segment_bases[segment]["options_sell"] += sell_value
-        else:
-            segment_bases[segment]["futures_buy"] += buy_value
-            segment_bases[segment]["futures_sell"] += sell_value
-
     turnover_bases = {
         "nfo": _segment_summary(segment_bases["NFO"]),
         "bfo": _segment_summary(segment_bases["BFO"]),
@@ -311,85 +347,88 @@ def _compute_turnover_bases(
     }
 
     defaults_payload = {
-        "count": len(defaulted_rows),
-        "rows": defaulted_rows[:10],
+        "count": int(defaulted_mask.sum()),
+        "rows": defaulted_rows,
         "note": "Missing/blank Exchg.Seg defaulted to NFO.",
     }
 
     return segment_bases, turnover_bases, defaults_payload, instrument_debug
 
 
-def _compute_assignment_stt(netwise_df: pd.DataFrame, rules_map: Dict[str, Dict]) -> Dict:
+def _compute_assignment_stt(
+    netwise_df: pd.DataFrame, rules_map: Dict[str, Dict], *, debug: bool = False
+) -> Dict:
     candidates: List[Dict] = []
     charged: List[Dict] = []
     defaulted_rows: List[Dict] = []
 
-    nfo_amount = 0.0
-    bfo_amount = 0.0
+    net_qty = _numeric_column(netwise_df, "NetQty")
+    active = net_qty != 0
+
+    segments = _segment_series(netwise_df)
+    defaulted_mask = segments.isna() & active
+    for position in np.flatnonzero(defaulted_mask.to_numpy())[:10]:
+        row = netwise_df.iloc[position]
+        defaulted_rows.append(
+            _default_debug(
+                row, netwise_df.index[position], "NFO", row.get("Exchg.Seg", "")
+            )
+        )
+    segments = segments.fillna("NFO")
 
-    for idx, row in netwise_df.iterrows():
-        net_qty = _to_float(row.get("NetQty", 0))
-        if net_qty == 0:
-            continue
+    is_option = _instrument_series(netwise_df) == "options"
+    qualifies = active & is_option & _assignment_mask(netwise_df)
 
-        original_seg = row.get("Exchg.Seg", "")
-        segment = normalize_segment(original_seg)
-        if segment is None:
-            segment = "NFO"
-            defaulted_rows.append(_default_debug(row, idx, segment, original_seg))
+    base_values = _numeric_column(netwise_df, "Actual Buy Value") + _numeric_column(
+        netwise_df, "Actual Sell Value"
+    )
+    base_values = base_values.where(
+        base_values != 0,
+        net_qty.abs() * _numeric_column(netwise_df, "LastTradePrice"),
+    )
+    segment_rates = {
+        "NFO": _assignment_rate(rules_map, "NSE_STT"),
+        "BFO": _assignment_rate(rules_map, "BSE_STT"),
+    }
+    rates = segments.map(segment_rates).astype(float)
+    amounts = (base_values * rates).where(qualifies, 0.0)
 
-        if segment not in {"NFO", "BFO"}:
-            continue
+    nfo_amount = float(amounts[segments == "NFO"].sum())
+    bfo_amount = float(amounts[segments == "BFO"].sum())
 
-        instrument = _classify_instrument(row)
-        is_option = instrument == "options"
-
-        settlement_type = str(row.get("SettlementType", "") or "").strip()
-        square_off_context = str(row.get("Square Off Context", "") or "").strip()
-        qualifies = _is_assignment_event(settlement_type, square_off_context)
-
-        candidate_payload = {
-            "trading_symbol": str(row.get("TradingSymbol", "")).strip(),
-            "segment": segment,
-            "segment_raw": str(original_seg).strip(),
-            "product_type": str(row.get("ProductType", "")).strip() or "UNKNOWN",
-            "instrument": instrument,
-            "net_qty": int(round(net_qty)),
-            "settlement_type": settlement_type,
-            "square_off_context": square_off_context,
-            "qualifies": qualifies and is_option,
-        }
-        candidates.append(candidate_payload)
-
-        if not is_option or not qualifies:
-            continue
-
-        buy_value = _to_float(row.get("Actual Buy Value", 0))
-        sell_value = _to_float(row.get("Actual Sell Value", 0))
-        base_value = buy_value + sell_value
-        if base_value == 0:
-            last_trade_price = _to_float(row.get("LastTradePrice", 0))
-            base_value = abs(net_qty) * last_trade_price
-
-        rate_key = "NSE_STT" if segment == "NFO" else "BSE_STT"
-        rule = rules_map.get(rate_key, {})
-        rate = eff(rule.get("rates", {}).get("assignment", 0) or 0)
-        amount = base_value * rate
-
-        charged_payload = {
-            "trading_symbol": candidate_payload["trading_symbol"],
-            "segment": segment,
-            "net_qty": candidate_payload["net_qty"],
-            "base": _round2(base_value),
-            "rate": rate,
-            "amount": _round2(amount),
-        }
-        charged.append(charged_payload)
-
-        if segment == "NFO":
-            nfo_amount += amount
-        else:
-            bfo_amount += amount
+    if debug:
+        for position in np.flatnonzero(active.to_numpy()):
+            row = netwise_df.iloc[position]
+            segment = segments.iat[position]
+            row_qualifies = bool(qualifies.iat[position])
+            candidate_payload = {
+                "trading_symbol": str(row.get("TradingSymbol", "")).strip(),
+                "segment": segment,
+                "segment_raw": str(row.get("Exchg.Seg", "")).strip(),
+                "product_type": str(row.get("ProductType", "")).strip() or "UNKNOWN",
+                "instrument": "options" if is_option.iat[position] else "futures",
+                "net_qty": int(round(net_qty.iat[position])),
+                "settlement_type": str(row.get("SettlementType", "") or "").strip(),
+                "square_off_context": str(
+                    row.get("Square Off Context", "") or ""
+                ).strip(),
+                "qualifies": row_qualifies,
+            }
+            candidates.append(candidate_payload)
+
+            if not row_qualifies:
+                continue
+
+            charged.append(
+                {
+                    "trading_symbol": candidate_payload["trading_symbol"],
+                    "segment": segment,
+                    "net_qty": candidate_payload["net_qty"],
+                    "base": _round2(base_values.iat[position]),
+                    "rate": segment_rates[segment],
+                    "amount": _round2(amounts.iat[position]),
+                }
+            )
 
     return {
         "nfo_amount": nfo_amount,
@@ -397,46 +436,50 @@ def _compute_assignment_stt(netwise_df: pd.DataFrame, rules_map: Dict[str, Dict]
         "candidates": candidates,
         "charged": charged,
         "segment_defaults": {
-            "count": len(defaulted_rows),
-            "rows": defaulted_rows[:10],
+            "count": int(defaulted_mask.sum()),
+            "rows": defaulted_rows,
             "note": "Missing/blank Exchg.Seg defaulted to NFO.",
         },
     }
 
 
+def _assignment_rate(rules_map: Dict[str, Dict], rule_key: str) -> float:
+    rule = rules_map.get(rule_key, {})
+    return eff(rule.get("rates", {}).get("assignment", 0) or 0)
+
+
 def _bill_line(code: str, label: str, amount: float) -> Dict:
     return {"code": code, "label": label, "amount": neg(amount)}
 
 
 def _round_charge(code: str, amount: float, label: str) -> Tuple[float, Dict]:
     decimals = 0 if code in _STT_CODES else 2
-    normalized = abs(amount)
-    rounded = _round_to(normalized, decimals)
+    rounded = _round_to(amount, decimals)
     debug_row = {
         "code": code,
         "label": label,
-        "pre_round": _round6(normalized),
+        "pre_round": _round6(amount),
         "post_round": rounded,
         "decimals": decimals,
     }
     return rounded, debug_row
 
 
-def _validate_toc_rates(segment: str, bases: Dict[str, float], rule: Optional[Dict]) -> None:
+def _validate_toc_rates(
+    segment: str, bases: Dict[str, float], rates: Optional[Tuple[float, float]]
+) -> None:
     futures_turnover = bases["futures_buy"] + bases["futures_sell"]
     options_turnover = bases["options_buy"] + bases["options_sell"]
     total_turnover = futures_turnover + options_turnover
     if total_turnover == 0:
         return
 
-    if not rule:
+    if rates is None:
         raise ValueError(
             f"{segment} TOC rule missing. Update rate card to match broker PDF."
         )
 
-    rates = rule.get("rates", {})
-    futures_rate = eff(rates.get("futures", 0) or 0)
-    options_rate = eff(rates.get("options", 0) or 0)
+    futures_rate, options_rate = rates
     if futures_rate == 0 and options_rate == 0:
         raise ValueError(
             f"{segment} TOC rates are zero. Ensure rate card matches broker PDF."
@@ -444,11 +487,8 @@ def _validate_toc_rates(segment: str, bases: Dict[str, float], rule: Optional[Di
 
 
 def _net_amount_from_daywise(day_df: pd.DataFrame) -> float:
-    buy_total = 0.0
-    sell_total = 0.0
-    for _, row in day_df.iterrows():
-        buy_total += _to_float(row.get("Actual Buy Value", 0))
-        sell_total += _to_float(row.get("Actual Sell Value", 0))
+    buy_total = float(_numeric_column(day_df, "Actual Buy Value").sum())
+    sell_total = float(_numeric_column(day_df, "Actual Sell Value").sum())
     return sell_total - buy_total
 
 
@@ -456,40 +496,61 @@ def normalize_segment(value: object) -> Optional[str]:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return None
     text = str(value).strip().upper()
-    if not text:
-        return None
-    if text in {"NFO", "NSEFO"}:
-        return "NFO"
-    if text in {"BFO", "BSEFO"}:
-        return "BFO"
-    return None
+    return _SEGMENT_ALIASES.get(text)
 
 
 def detect_instrument(trading_symbol: object) -> str:
     text = str(trading_symbol or "").upper()
-    if re.search(r"\bCE\b", text) or re.search(r"\bPE\b", text):
+    if _OPTION_SYMBOL_PATTERN.search(text):
         return "options"
     return "futures"
 
 
-def _classify_instrument(row: pd.Series) -> str:
-    symbol = str(row.get("TradingSymbol", "")).strip()
-    return detect_instrument(symbol)
+def _segment_series(df: pd.DataFrame) -> pd.Series:
+    if "Exchg.Seg" not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    raw = df["Exchg.Seg"]
+    text = raw.where(raw.notna(), "").astype(str).str.strip().str.upper()
+    return text.map(_SEGMENT_ALIASES).astype(object)
 
 
-def _is_assignment_event(settlement_type: str, square_off_context: str) -> bool:
-    pattern = re.compile(r"(EXE|EXERCISE|ASSIGN)", re.IGNORECASE)
-    if pattern.search(settlement_type or ""):
-        return True
-    if pattern.search(square_off_context or ""):
-        return True
-    return False
+def _instrument_series(df: pd.DataFrame) -> pd.Series:
+    if "TradingSymbol" not in df.columns:
+        return pd.Series("futures", index=df.index, dtype=object)
+    symbols = df["TradingSymbol"].astype(str).str.strip().str.upper()
+    is_option = symbols.str.contains(_OPTION_SYMBOL_PATTERN, na=False)
+    return pd.Series(
+        np.where(is_option, "options", "futures"), index=df.index, dtype=object
+    )
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def _numeric_column(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[column], errors="coerce").fillna(0.0).astype(float)
+
+
+def _assignment_mask(df: pd.DataFrame) -> pd.Series:
+    settlement = _text_column(df, "SettlementType")
+    context = _text_column(df, "Square Off Context")
+    return settlement.str.contains(_ASSIGNMENT_PATTERN, na=False) | context.str.contains(
+        _ASSIGNMENT_PATTERN, na=False
+    )
 
 
 def eff(rate: float) -> float:
     return float(rate or 0.0) / 100.0
 
 
+_BILL_DECIMALS = {"stt": 0}
+_GST_BASE_TOTALS = ("toc_nse", "toc_bse", "clearing", "sebi", "ipft")
+
 _STT_CODES = {
     "NFO_STT_SELL",
     "BFO_STT_SELL",
@@ -514,13 +575,6 @@ def neg(value: float) -> float:
     return -abs(float(value or 0.0))
 
 
-def _to_float(value: object) -> float:
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return 0.0
-    numeric = pd.to_numeric(value, errors="coerce")
-    return float(0.0 if pd.isna(numeric) else numeric)
-
-
 def _init_segment_bases() -> Dict[str, float]:
     return {
         "futures_buy": 0.0,
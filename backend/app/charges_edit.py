@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import json
 import re
+from functools import lru_cache
 from typing import Any, Dict, Iterable, List, Optional
 
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def parse_json_list(raw: Optional[str], label: str) -> List[Dict[str, Any]]:
     if raw is None or raw.strip() == "":
@@ -22,28 +25,53 @@ def apply_user_edits(
     overrides: Iterable[Dict[str, Any]],
     additions: Iterable[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    bill_lines = [dict(line) for line in charges.get("bill_lines", [])]
+    overrides_list = list(overrides or [])
+    additions_list = list(additions or [])
+    if not overrides_list and not additions_list and all(
+        key in charges for key in _TOTAL_KEYS
+    ):
+        # Nothing to edit: the totals computed with the charges already stand.
+        return dict(charges)
+
+    # Shallow copy: a line dict is copied only when an edit touches it, so the
+    # caller's charges are never mutated.
+    bill_lines = list(charges.get("bill_lines", []))
     index_by_code = {line.get("code"): idx for idx, line in enumerate(bill_lines)}
 
     overridden_codes: set[str] = set()
-    for item in overrides or []:
+    for item in overrides_list:
         if not isinstance(item, dict):
             raise ValueError("override entries must be objects")
         code = str(item.get("code", "")).strip()
         if not code or code not in index_by_code:
             raise ValueError("override code not found in charges")
         amount = _parse_amount(item.get("amount"))
-        bill_lines[index_by_code[code]]["amount"] = _neg_amount(amount)
+        idx = index_by_code[code]
+        bill_lines[idx] = {**bill_lines[idx], "amount": _neg_amount(amount)}
         overridden_codes.add(code)
 
-    computed_label_map = {
-        normalize_name_key(line.get("label", "")): line.get("label", "")
-        for line in bill_lines
-    }
+    # One pass for both totals, continued by the additions loop below; the
+    # CGST/SGST lines are added to the expenses once they have been recomputed.
+    gst_positions = {index_by_code.get("CGST_9"), index_by_code.get("SGST_9")}
+    gst_base = 0.0
+    total_expenses = 0.0
+    for idx, line in enumerate(bill_lines):
+        amount = float(line.get("amount", 0))
+        if line.get("code") in GST_APPLICABLE_CODES:
+            gst_base += abs(amount)
+        if idx not in gst_positions:
+            total_expenses += amount
+
+    computed_label_map: Dict[str, Any] = {}
+    if additions_list:
+        computed_label_map = {
+            normalize_name_key(line.get("label", "")): line.get("label", "")
+            for line in bill_lines
+        }
     additions_seen: set[str] = set()
     additions_lines: List[Dict[str, Any]] = []
 
-    for item in additions or []:
+    for position, item in enumerate(additions_list, start=1):
         if not isinstance(item, dict):
             raise ValueError("addition entries must be objects")
         display_name = normalize_display_name(item.get("name", ""))
@@ -52,19 +80,22 @@ def apply_user_edits(
         name_key = normalize_name_key(display_name)
         if name_key in computed_label_map or name_key in additions_seen:
             raise ValueError("Charge already exists; edit it instead.")
-        amount = _parse_amount(item.get("amount"))
+        amount = _neg_amount(_parse_amount(item.get("amount")))
         gst_applicable = bool(item.get("gst_applicable", False))
         additions_seen.add(name_key)
         additions_lines.append(
             {
-                "code": f"CUSTOM_{len(additions_lines) + 1}",
+                "code": f"CUSTOM_{position}",
                 "label": display_name,
-                "amount": _neg_amount(amount),
+                "amount": amount,
                 "gst_applicable": gst_applicable,
             }
         )
+        if gst_applicable:
+            gst_base += abs(amount)
+        total_expenses += amount
 
-    gst_base = _round2(_gst_base_from_lines(bill_lines, additions_lines))
+    gst_base = _round2(gst_base)
 
     cgst_value = _round2(gst_base * 0.09)
     sgst_value = _round2(gst_base * 0.09)
@@ -77,14 +108,16 @@ def apply_user_edits(
     _ensure_gst_line(bill_lines, index_by_code, "CGST_9", "CGST @ 9%", cgst_value, overridden_codes)
     _ensure_gst_line(bill_lines, index_by_code, "SGST_9", "SGST @ 9%", sgst_value, overridden_codes)
 
-    updated_bill_lines = bill_lines + additions_lines
+    for code in ("CGST_9", "SGST_9"):
+        total_expenses += float(bill_lines[index_by_code[code]].get("amount", 0))
+    total_expenses = _round2(total_expenses)
+    bill_lines.extend(additions_lines)
 
-    total_expenses = _round2(sum(float(line.get("amount", 0)) for line in updated_bill_lines))
     net_amount = float(charges.get("net_amount", 0))
     total_bill_amount = _round2(net_amount + total_expenses)
 
     updated = dict(charges)
-    updated["bill_lines"] = updated_bill_lines
+    updated["bill_lines"] = bill_lines
     updated["gst_base"] = gst_base
     updated["gst_total"] = _round2(cgst_value + sgst_value)
     updated["total_expenses"] = total_expenses
@@ -97,19 +130,7 @@ def apply_user_edits(
 
 
 GST_APPLICABLE_CODES = {"TOC_NSE", "TOC_BSE", "CLEARING", "SEBI", "IPFT"}
-
-
-def _gst_base_from_lines(
-    bill_lines: Iterable[Dict[str, Any]], additions: Iterable[Dict[str, Any]]
-) -> float:
-    total = 0.0
-    for line in bill_lines:
-        if line.get("code") in GST_APPLICABLE_CODES:
-            total += abs(float(line.get("amount", 0)))
-    for line in additions:
-        if line.get("gst_applicable"):
-            total += abs(float(line.get("amount", 0)))
-    return total
+_TOTAL_KEYS = ("gst_base", "gst_total", "total_expenses", "total_bill_amount")
 
 
 def _ensure_gst_line(
@@ -121,18 +142,27 @@ def _ensure_gst_line(
     overridden_codes: set[str],
 ) -> None:
     if code in index_by_code:
+        idx = index_by_code[code]
+        line = bill_lines[idx]
+        updates: Dict[str, Any] = {}
         if code not in overridden_codes:
-            bill_lines[index_by_code[code]]["amount"] = _neg_amount(value)
-        if not bill_lines[index_by_code[code]].get("label"):
-            bill_lines[index_by_code[code]]["label"] = label
+            updates["amount"] = _neg_amount(value)
+        if not line.get("label"):
+            updates["label"] = label
+        if updates:
+            bill_lines[idx] = {**line, **updates}
         return
     bill_lines.append({"code": code, "label": label, "amount": _neg_amount(value)})
     index_by_code[code] = len(bill_lines) - 1
 
 
 def normalize_display_name(value: Any) -> str:
-    text = str(value or "")
-    return re.sub(r"\s+", " ", text.strip())
+    return _collapse_whitespace(str(value or ""))
+
+
+@lru_cache(maxsize=4096)
+def _collapse_whitespace(text: str) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", text.strip())
 
 
 def normalize_name_key(value: Any) -> str:
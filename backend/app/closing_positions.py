@@ -1,12 +1,31 @@
 from __future__ import annotations
 
 from datetime import date, datetime
+from functools import lru_cache
 import re
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-
+from app.df_utils import alnum_lower
+
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_DAY_MONTH_YEAR_TOKEN_PATTERN = re.compile(r"(?<!\d)(\d{1,2})([A-Z]{3})(\d{2,4})(?!\d)")
+_DMY_PATTERN = re.compile(r"(?<!\d)(\d{1,2})[-/](\d{1,2})[-/](\d{2,4})(?!\d)")
+_YMD_PATTERN = re.compile(r"(?<!\d)(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?!\d)")
+_DAY_MONTH_TOKEN_PATTERN = re.compile(r"(?<!\d)(\d{1,2})([A-Z]{3})(?!\d)")
+_COMPACT_DATE_FORMATS = ("%d%b%Y", "%d%b%y")
+_DATE_FORMATS = (
+    "%d-%m-%Y",
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+    "%d-%b-%Y",
+    "%d-%b-%y",
+) + _COMPACT_DATE_FORMATS
 _MONTHS = {
     "JAN": 1,
     "FEB": 2,
@@ -37,8 +56,9 @@ def build_closing_positions(
     if net_df is None or not isinstance(net_df, pd.DataFrame) or net_df.empty:
         return [], 0.0, "MISSING"
 
+    col_map = _build_col_map(net_df)
     contract_col = _find_first_column(
-        net_df,
+        col_map,
         [
             "TradingSymbol",
             "Trading Symbol",
@@ -49,14 +69,14 @@ def build_closing_positions(
         ],
     )
     net_qty_col = _find_first_column(
-        net_df,
+        col_map,
         ["NetQty", "Net Qty", "Net Quantity", "Net_Qty"],
     )
     if not contract_col or not net_qty_col:
         return [], 0.0, "MISSING"
 
     ltp_columns = _ordered_existing_columns(
-        net_df,
+        col_map,
         [
             "LastTradePrice",
             "Last Traded Price",
@@ -76,7 +96,7 @@ def build_closing_positions(
         ],
     )
     expiry_col = _find_first_column(
-        net_df,
+        col_map,
         [
             "Expiry",
             "Expiry Date",
@@ -93,19 +113,22 @@ def build_closing_positions(
     rows: List[Dict] = []
     total_value = 0.0
 
-    for _, row in net_df.iterrows():
-        net_qty = _to_int(row.get(net_qty_col))
-        if net_qty == 0:
-            continue
+    net_qtys = np.round(np.nan_to_num(_numeric_values(net_df[net_qty_col]), nan=0.0))
+    ltps = _best_numeric_values(net_df, ltp_columns)
+    contracts = net_df[contract_col].to_numpy(dtype=object)
+    expiries = net_df[expiry_col].to_numpy(dtype=object) if expiry_col else None
 
-        contract = str(row.get(contract_col, "") or "").strip()
+    for position in np.flatnonzero(net_qtys != 0):
+        net_qty = int(net_qtys[position])
+        contract = str(contracts[position] or "").strip()
         if not contract:
             contract = "N/A"
 
-        if trade_date and _is_confidently_expired(row, contract, expiry_col, trade_date):
+        expiry_value = expiries[position] if expiries is not None else None
+        if trade_date and _is_confidently_expired(expiry_value, contract, trade_date):
             continue
 
-        ltp = _best_numeric_value(row, ltp_columns)
+        ltp = float(ltps[position])
         value = float(net_qty) * ltp
         total_value += value
 
@@ -126,15 +149,13 @@ def build_closing_positions(
 
 
 def _is_confidently_expired(
-    row: pd.Series,
+    expiry_value: object,
     contract: str,
-    expiry_col: Optional[str],
     trade_date: date,
 ) -> bool:
-    if expiry_col:
-        explicit_expiry = _parse_date(row.get(expiry_col))
-        if explicit_expiry:
-            return explicit_expiry < trade_date
+    explicit_expiry = _parse_date(expiry_value)
+    if explicit_expiry:
+        return explicit_expiry < trade_date
 
     parsed_expiry, confident = _parse_expiry_from_contract(contract, trade_date)
     if not parsed_expiry or not confident:
@@ -142,13 +163,14 @@ def _is_confidently_expired(
     return parsed_expiry < trade_date
 
 
+@lru_cache(maxsize=2048)
 def _parse_expiry_from_contract(contract: str, trade_date: date) -> Tuple[Optional[date], bool]:
     text = str(contract or "").upper()
-    text = re.sub(r"\s+", " ", text.strip())
+    text = _WHITESPACE_PATTERN.sub(" ", text.strip())
     if not text:
         return None, False
 
-    token_with_year = re.search(r"(?<!\d)(\d{1,2})([A-Z]{3})(\d{2,4})(?!\d)", text)
+    token_with_year = _DAY_MONTH_YEAR_TOKEN_PATTERN.search(text)
     if token_with_year:
         day_value = int(token_with_year.group(1))
         month_value = _MONTHS.get(token_with_year.group(2))
@@ -159,7 +181,7 @@ def _parse_expiry_from_contract(contract: str, trade_date: date) -> Tuple[Option
             except ValueError:
                 pass
 
-    dmy_match = re.search(r"(?<!\d)(\d{1,2})[-/](\d{1,2})[-/](\d{2,4})(?!\d)", text)
+    dmy_match = _DMY_PATTERN.search(text)
     if dmy_match:
         day_value = int(dmy_match.group(1))
         month_value = int(dmy_match.group(2))
@@ -170,7 +192,7 @@ def _parse_expiry_from_contract(contract: str, trade_date: date) -> Tuple[Option
             except ValueError:
                 pass
 
-    ymd_match = re.search(r"(?<!\d)(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?!\d)", text)
+    ymd_match = _YMD_PATTERN.search(text)
     if ymd_match:
         year_value = int(ymd_match.group(1))
         month_value = int(ymd_match.group(2))
@@ -180,7 +202,7 @@ def _parse_expiry_from_contract(contract: str, trade_date: date) -> Tuple[Option
         except ValueError:
             pass
 
-    token_without_year = re.search(r"(?<!\d)(\d{1,2})([A-Z]{3})(?!\d)", text)
+    token_without_year = _DAY_MONTH_TOKEN_PATTERN.search(text)
     if token_without_year:
         day_value = int(token_without_year.group(1))
         month_value = _MONTHS.get(token_without_year.group(2))
@@ -205,6 +227,18 @@ def _normalize_year(value: str) -> Optional[int]:
     return None
 
 
+def _is_iso_date_text(text: str) -> bool:
+    return (
+        len(text) == 10
+        and text.isascii()
+        and text[4] == "-"
+        and text[7] == "-"
+        and text[:4].isdigit()
+        and text[5:7].isdigit()
+        and text[8:10].isdigit()
+    )
+
+
 def _parse_date(value: object) -> Optional[date]:
     if value is None:
         return None
@@ -217,17 +251,17 @@ def _parse_date(value: object) -> Optional[date]:
     if not text:
         return None
 
-    for fmt in (
-        "%d-%m-%Y",
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%Y/%m/%d",
-        "%d.%m.%Y",
-        "%d-%b-%Y",
-        "%d-%b-%y",
-        "%d%b%Y",
-        "%d%b%y",
-    ):
+    if _is_iso_date_text(text):
+        try:
+            return date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+        except ValueError:
+            pass
+
+    # Every format but the compact ones needs a separator, so skip straight past them.
+    formats = _DATE_FORMATS
+    if not any(separator in text for separator in "-/."):
+        formats = _COMPACT_DATE_FORMATS
+    for fmt in formats:
         try:
             return datetime.strptime(text, fmt).date()
         except ValueError:
@@ -239,52 +273,43 @@ def _parse_date(value: object) -> Optional[date]:
     return parsed.date()
 
 
-def _best_numeric_value(row: pd.Series, columns: List[str]) -> float:
-    first_numeric: Optional[float] = None
-    for column in columns:
-        value = _to_float_or_none(row.get(column))
-        if value is None:
-            continue
-        if first_numeric is None:
-            first_numeric = value
-        if abs(value) > 1e-9:
-            return value
-    if first_numeric is not None:
-        return first_numeric
-    return 0.0
+def _best_numeric_values(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Per row: first non-zero numeric value across columns, else first numeric, else 0."""
+    if not columns:
+        return np.zeros(len(df))
+    values = np.column_stack([_numeric_values(df[column]) for column in columns])
+    numeric = ~np.isnan(values)
+    nonzero = numeric & (np.abs(values) > 1e-9)
+    chosen = np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), numeric.argmax(axis=1))
+    best = values[np.arange(len(values)), chosen]
+    return np.where(numeric.any(axis=1), best, 0.0)
 
 
-def _to_int(value: object) -> int:
-    numeric = _to_float_or_none(value)
-    if numeric is None:
-        return 0
-    return int(round(numeric))
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
 
 
-def _to_float_or_none(value: object) -> Optional[float]:
-    if value is None:
-        return None
-    numeric = pd.to_numeric(value, errors="coerce")
-    if pd.isna(numeric):
-        return None
-    return float(numeric)
+def _build_col_map(df: pd.DataFrame) -> Dict[str, str]:
+    return {_normalize_col_name(col): col for col in df.columns}
 
 
-def _ordered_existing_columns(df: pd.DataFrame, candidates: List[str]) -> List[str]:
+def _ordered_existing_columns(col_map: Dict[str, str], candidates: List[str]) -> List[str]:
     existing: List[str] = []
-    normalized_df_cols = {_normalize_col_name(col): col for col in df.columns}
     for candidate in candidates:
-        matched = normalized_df_cols.get(_normalize_col_name(candidate))
+        matched = col_map.get(_normalize_col_name(candidate))
         if matched and matched not in existing:
             existing.append(matched)
     return existing
 
 
-def _find_first_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
-    columns = _ordered_existing_columns(df, candidates)
-    return columns[0] if columns else None
+def _find_first_column(col_map: Dict[str, str], candidates: List[str]) -> Optional[str]:
+    for candidate in candidates:
+        matched = col_map.get(_normalize_col_name(candidate))
+        if matched:
+            return matched
+    return None
 
 
+@lru_cache(maxsize=512, typed=True)
 def _normalize_col_name(value: object) -> str:
-    text = str(value or "").strip().lower()
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value or ""))
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-import re
 from typing import Dict, Iterable, Optional
 
 import pandas as pd
 
+_ALNUM_BYTES = b"abcdefghijklmnopqrstuvwxyz0123456789"
+_NON_ALNUM_BYTES = bytes(byte for byte in range(128) if byte not in _ALNUM_BYTES)
+
+
+def alnum_lower(text: str) -> str:
+    """Lower-case text and keep only a-z/0-9, like re.sub(r"[^a-z0-9]", "", text.lower())."""
+    ascii_text = text.lower().encode("ascii", "ignore")
+    return ascii_text.translate(None, _NON_ALNUM_BYTES).decode("ascii")
+
 
 def normalize_optional_lot_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -57,6 +65,4 @@ def _find_first_matching_column(
 
 
 def _canonicalize(value: object) -> str:
-    text = str(value or "").strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value or ""))
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import re
 from datetime import date
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from app.expiry_settlement import parse_expiry
+from app.df_utils import alnum_lower
+from app.expiry_settlement import expiring_on
 
 FEE_PER_LOT = 2.0
 
@@ -23,29 +24,45 @@ def compute_expiry_lot_fee(
     if net_df is None or not isinstance(net_df, pd.DataFrame) or net_df.empty:
         return 0.0, []
 
-    expiry_col = _find_column(net_df, ["Expiry"])
-    net_qty_col = _find_column(net_df, ["NetQty", "Net Qty"])
+    col_map = _build_col_map(net_df)
+    expiry_col = _find_column(col_map, ["Expiry"])
+    net_qty_col = _find_column(col_map, ["NetQty", "Net Qty"])
     if not expiry_col or not net_qty_col:
         return 0.0, []
 
-    trading_symbol_col = _find_column(net_df, ["TradingSymbol", "Trading Symbol", "Symbol"])
-    option_type_col = _find_column(net_df, ["Option Type"])
-    instrument_type_col = _find_column(net_df, ["InstrumentType", "Instrument Type"])
+    trading_symbol_col = _find_column(col_map, ["TradingSymbol", "Trading Symbol", "Symbol"])
+    option_type_col = _find_column(col_map, ["Option Type"])
+    instrument_type_col = _find_column(col_map, ["InstrumentType", "Instrument Type"])
     net_lot_col = _find_column(
-        net_df,
+        col_map,
         ["NetLot", "Net Lot", "Net Lots", "NetLotQty", "Net Lot Qty"],
     )
-    lot_size_col = _find_column(net_df, ["LotSize", "Lot Size", "Lot_Size"])
+    lot_size_col = _find_column(col_map, ["LotSize", "Lot Size", "Lot_Size"])
 
-    parsed_expiry = net_df[expiry_col].map(parse_expiry)
     net_qty_values = pd.to_numeric(net_df[net_qty_col], errors="coerce").fillna(0.0)
-    expiring_mask = parsed_expiry == bill_date
+    expiring_mask = expiring_on(net_df[expiry_col], bill_date)
     nonzero_qty_mask = net_qty_values != 0
 
     total_fee = 0.0
     debug_rows: List[Dict] = []
 
-    for idx, row in net_df.loc[expiring_mask & nonzero_qty_mask].iterrows():
+    row_columns = [
+        col
+        for col in dict.fromkeys(
+            [
+                trading_symbol_col,
+                option_type_col,
+                instrument_type_col,
+                net_qty_col,
+                net_lot_col,
+                lot_size_col,
+                expiry_col,
+            ]
+        )
+        if col
+    ]
+    rows = net_df.loc[expiring_mask & nonzero_qty_mask, row_columns].to_dict("records")
+    for row in rows:
         trading_symbol = _as_text(row.get(trading_symbol_col) if trading_symbol_col else "")
         option_type = _as_text(row.get(option_type_col) if option_type_col else "").upper()
         instrument_type = _as_text(
@@ -93,7 +110,7 @@ def compute_expiry_lot_fee(
 
 def _resolve_net_lot(
     *,
-    row: pd.Series,
+    row: Dict[str, Any],
     net_qty: float,
     net_lot_col: Optional[str],
     lot_size_col: Optional[str],
@@ -119,41 +136,67 @@ def _is_derivative(
 ) -> bool:
     symbol_upper = trading_symbol.upper()
 
-    is_option = option_type in {"CE", "PE"} or bool(
-        re.search(r"\bCE\b|\bPE\b", symbol_upper)
+    is_option = (
+        option_type in {"CE", "PE"}
+        or _has_token(symbol_upper, "CE")
+        or _has_token(symbol_upper, "PE")
     )
     is_future = (
         "FUTIDX" in symbol_upper
         or "FUTSTK" in symbol_upper
-        or bool(re.search(r"\bFUT\b", symbol_upper))
+        or _has_token(symbol_upper, "FUT")
         or "FUT" in instrument_type
     )
     return is_option or is_future
 
 
-def _find_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
-    normalized_map = {_canonicalize(col): col for col in df.columns}
+def _has_token(text: str, token: str) -> bool:
+    """Substring equivalent of re.search(rf"\b{token}\b", text) for a word-character token."""
+    start = text.find(token)
+    while start != -1:
+        end = start + len(token)
+        if (start == 0 or not _is_word_char(text[start - 1])) and (
+            end == len(text) or not _is_word_char(text[end])
+        ):
+            return True
+        start = text.find(token, start + 1)
+    return False
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _build_col_map(df: pd.DataFrame) -> Dict[str, str]:
+    return {_canonicalize(col): col for col in df.columns}
+
+
+def _find_column(col_map: Dict[str, str], candidates: List[str]) -> Optional[str]:
     for candidate in candidates:
-        found = normalized_map.get(_canonicalize(candidate))
+        found = col_map.get(_canonicalize(candidate))
         if found:
             return found
     return None
 
 
+@lru_cache(maxsize=512, typed=True)
 def _canonicalize(value: object) -> str:
-    text = str(value or "").strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value or ""))
 
 
 def _to_float(value: object) -> float:
-    numeric = pd.to_numeric(value, errors="coerce")
-    if pd.isna(numeric):
-        return 0.0
-    return float(numeric)
+    numeric = _to_float_or_none(value)
+    return 0.0 if numeric is None else numeric
 
 
 def _to_float_or_none(value: object) -> Optional[float]:
+    if value is None:
+        return None
+    # Numbers from to_dict("records") skip pandas dispatch; strings keep
+    # pd.to_numeric's parsing rules (float() would also accept "1_000").
+    if isinstance(value, (int, float)):
+        numeric = float(value)
+        return None if numeric != numeric else numeric
     numeric = pd.to_numeric(value, errors="coerce")
     if pd.isna(numeric):
         return None
@@ -1,23 +1,33 @@
 from __future__ import annotations
 
 from datetime import date, datetime
+from functools import lru_cache
 import re
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.df_utils import alnum_lower
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_EXPIRY_TOKEN_PATTERN = re.compile(r"(\d{1,2})([a-zA-Z]{3})(\d{4})")
+
 
 def parse_expiry(value: str) -> Optional[date]:
     """Parse expiry strings like 12Feb2026."""
     if value is None:
         return None
+    return _parse_expiry_text(str(value).strip())
 
-    text = str(value).strip()
+
+@lru_cache(maxsize=2048)
+def _parse_expiry_text(text: str) -> Optional[date]:
+    # Netwise files repeat a handful of expiry strings, so parse each one once.
     if not text:
         return None
 
-    compact = re.sub(r"\s+", "", text)
-    match = re.match(r"^(\d{1,2})([a-zA-Z]{3})(\d{4})$", compact)
+    match = _EXPIRY_TOKEN_PATTERN.fullmatch(_WHITESPACE_PATTERN.sub("", text))
     if not match:
         return None
 
@@ -29,6 +39,14 @@ def parse_expiry(value: str) -> Optional[date]:
         return None
 
 
+def expiring_on(values: pd.Series, bill_date: date) -> pd.Series:
+    """Vectorized equivalent of values.map(parse_expiry) == bill_date."""
+    compact = values.astype(str).str.replace(_WHITESPACE_PATTERN, "", regex=True)
+    tokens = compact.where(compact.str.fullmatch(_EXPIRY_TOKEN_PATTERN, na=False))
+    parsed = pd.to_datetime(tokens, format="%d%b%Y", errors="coerce")
+    return parsed == pd.Timestamp(bill_date)
+
+
 def apply_expiry_settlement(
     net_df: pd.DataFrame,
     bill_date: date,
@@ -39,26 +57,30 @@ def apply_expiry_settlement(
       net_df_for_closing, settlement_rows, settlement_total, pending_rows
     """
     if net_df is None or not isinstance(net_df, pd.DataFrame) or net_df.empty:
-        empty = net_df.copy() if isinstance(net_df, pd.DataFrame) else pd.DataFrame()
+        empty = net_df.copy(deep=False) if isinstance(net_df, pd.DataFrame) else pd.DataFrame()
         return empty, [], 0.0, []
 
     normalized_manual_closes = _normalize_manual_closes(manual_closes)
-    expiry_col = _find_column(net_df, ["Expiry"])
+    col_map = _build_col_map(net_df)
+    expiry_col = _find_column(col_map, ["Expiry"])
     if not expiry_col:
-        return net_df.copy(), [], 0.0, []
+        return net_df.copy(deep=False), [], 0.0, []
 
-    option_type_col = _find_column(net_df, ["Option Type"])
-    net_qty_col = _find_column(net_df, ["NetQty", "Net Qty"])
-    trading_symbol_col = _find_column(net_df, ["TradingSymbol", "Trading Symbol"])
-    strike_col = _find_column(net_df, ["Strike Price"])
-    lot_size_col = _find_column(net_df, ["LotSize", "Lot Size"])
-    multiplier_col = _find_column(net_df, ["Multiplier"])
-    net_lot_col = _find_column(net_df, ["NetLot", "Net Lot", "Net Lots", "NetLotQty"])
+    option_type_col = _find_column(col_map, ["Option Type"])
+    net_qty_col = _find_column(col_map, ["NetQty", "Net Qty"])
+    trading_symbol_col = _find_column(col_map, ["TradingSymbol", "Trading Symbol"])
+    strike_col = _find_column(col_map, ["Strike Price"])
+    lot_size_col = _find_column(col_map, ["LotSize", "Lot Size"])
+    multiplier_col = _find_column(col_map, ["Multiplier"])
+    net_lot_col = _find_column(col_map, ["NetLot", "Net Lot", "Net Lots", "NetLotQty"])
 
-    parsed_expiry = net_df[expiry_col].map(parse_expiry)
-    expired_on_bill_date_mask = parsed_expiry == bill_date
+    expired_on_bill_date_mask = expiring_on(net_df[expiry_col], bill_date)
+    # pandas>=3 (pinned in requirements) makes shallow copies copy-on-write, so
+    # callers may still modify the result freely.
+    if not expired_on_bill_date_mask.any():
+        return net_df.copy(deep=False), [], 0.0, []
 
-    net_df_for_closing = net_df.loc[~expired_on_bill_date_mask].copy()
+    net_df_for_closing = net_df.loc[~expired_on_bill_date_mask]
 
     if not option_type_col or not net_qty_col:
         return net_df_for_closing, [], 0.0, []
@@ -67,34 +89,88 @@ def apply_expiry_settlement(
     pending_rows: List[Dict] = []
     settlement_total = 0.0
 
-    expired_df = net_df.loc[expired_on_bill_date_mask].copy()
-    for idx, row in expired_df.iterrows():
-        option_type = str(row.get(option_type_col, "") or "").strip().upper()
-        if option_type not in {"CE", "PE"}:
-            continue
-
-        net_qty = _to_float(row.get(net_qty_col))
-        if abs(net_qty) < 1e-9:
-            continue
-        net_lot = _resolve_net_lot_for_display(
-            row=row,
-            net_qty=net_qty,
-            net_lot_col=net_lot_col,
-            lot_size_col=lot_size_col,
+    row_columns = [
+        col
+        for col in dict.fromkeys(
+            [
+                option_type_col,
+                net_qty_col,
+                trading_symbol_col,
+                expiry_col,
+                strike_col,
+                lot_size_col,
+                multiplier_col,
+                net_lot_col,
+            ]
         )
+        if col
+    ]
+    expired_df = net_df.loc[expired_on_bill_date_mask, row_columns]
+    if trading_symbol_col:
+        trading_symbols = expired_df[trading_symbol_col].map(_as_str).astype(object)
+    else:
+        trading_symbols = pd.Series("", index=expired_df.index, dtype=object)
+    underlying_symbols = _underlying_symbols(trading_symbols)
+
+    option_types = (
+        expired_df[option_type_col]
+        .astype("string")
+        .str.strip()
+        .str.upper()
+        .fillna("")
+        .to_numpy(dtype=object)
+    )
+    net_qtys = np.nan_to_num(_column_floats(expired_df, net_qty_col), nan=0.0)
+    strikes = _column_floats(expired_df, strike_col)
+    lot_sizes = _column_floats(expired_df, lot_size_col)
+    net_lots = _column_floats(expired_df, net_lot_col)
+    multipliers = _column_floats(expired_df, multiplier_col)
+    closes = underlying_symbols.map(normalized_manual_closes).to_numpy(
+        dtype=float, na_value=np.nan
+    )
 
-        trading_symbol = _as_str(
-            row.get(trading_symbol_col) if trading_symbol_col else ""
+    # Settlement arithmetic runs on whole columns; the loop below only builds
+    # the payload dicts for the rows that settle or stay pending.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        intrinsic_raw = np.where(option_types == "CE", closes - strikes, strikes - closes)
+        intrinsics = np.where(intrinsic_raw > 0.0, intrinsic_raw, 0.0)
+        multiplier_values = np.where(
+            multipliers > 0,
+            multipliers,
+            # If net qty appears to already be in lot units, multiply by lot size.
+            np.where(
+                (lot_sizes > 0)
+                & (np.abs(net_lots) > 1e-9)
+                & (np.abs(np.abs(net_qtys) - np.abs(net_lots)) <= 1e-9),
+                lot_sizes,
+                1.0,
+            ),
+        )
+        settlement_amounts = net_qtys * intrinsics * multiplier_values
+        action_statuses = np.select(
+            [intrinsics == 0, net_qtys > 0], ["EXPIRE_OTM", "EXERCISE"], default="ASSIGN"
+        ).astype(object)
+        display_net_lots = np.where(
+            ~np.isnan(net_lots),
+            net_lots,
+            np.where(np.abs(lot_sizes) > 1e-9, net_qtys / lot_sizes, np.nan),
         )
-        underlying_symbol = _extract_underlying_symbol(trading_symbol)
-        manual_close = normalized_manual_closes.get(underlying_symbol)
+    candidates = np.flatnonzero(
+        ((option_types == "CE") | (option_types == "PE")) & (np.abs(net_qtys) >= 1e-9)
+    )
+    expiry_texts = expired_df[expiry_col].to_numpy(dtype=object)
 
-        expiry_text = _as_str(row.get(expiry_col, ""))
-        strike_value = _to_float_or_none(row.get(strike_col)) if strike_col else None
+    for position in candidates:
+        option_type = option_types[position]
+        net_qty = float(net_qtys[position])
+        net_lot = _float_or_none(display_net_lots[position])
+        underlying_symbol = underlying_symbols.iat[position]
+        manual_close = _float_or_none(closes[position])
+        strike_value = _float_or_none(strikes[position])
 
         base_payload = {
-            "trading_symbol": trading_symbol,
-            "expiry": expiry_text,
+            "trading_symbol": trading_symbols.iat[position],
+            "expiry": _as_str(expiry_texts[position]),
             "option_type": option_type,
             "strike": strike_value,
             "net_lot": net_lot,
@@ -132,26 +208,9 @@ def apply_expiry_settlement(
             )
             continue
 
-        if option_type == "CE":
-            intrinsic = max(0.0, manual_close - strike_value)
-        else:
-            intrinsic = max(0.0, strike_value - manual_close)
-
-        multiplier = _resolve_multiplier(
-            row=row,
-            net_qty=net_qty,
-            lot_size_col=lot_size_col,
-            multiplier_col=multiplier_col,
-            net_lot_col=net_lot_col,
-        )
-        settlement_amount = net_qty * intrinsic * multiplier
-
-        if intrinsic == 0:
-            action_status = "EXPIRE_OTM"
-        elif net_qty > 0:
-            action_status = "EXERCISE"
-        else:
-            action_status = "ASSIGN"
+        intrinsic = float(intrinsics[position])
+        settlement_amount = float(settlement_amounts[position])
+        action_status = action_statuses[position]
 
         settlement_rows.append(
             {
@@ -169,80 +228,41 @@ def apply_expiry_settlement(
     return net_df_for_closing, settlement_rows, float(settlement_total), pending_rows
 
 
-def _resolve_multiplier(
-    *,
-    row: pd.Series,
-    net_qty: float,
-    lot_size_col: Optional[str],
-    multiplier_col: Optional[str],
-    net_lot_col: Optional[str],
-) -> float:
-    multiplier_value = (
-        _to_float_or_none(row.get(multiplier_col)) if multiplier_col else None
-    )
-    if multiplier_value is not None and multiplier_value > 0:
-        return multiplier_value
-
-    lot_size = _to_float_or_none(row.get(lot_size_col)) if lot_size_col else None
-    net_lot = _to_float_or_none(row.get(net_lot_col)) if net_lot_col else None
-
-    # If net qty appears to already be in lot units, multiply by lot size.
-    if (
-        lot_size is not None
-        and lot_size > 0
-        and net_lot is not None
-        and abs(net_lot) > 1e-9
-        and abs(abs(net_qty) - abs(net_lot)) <= 1e-9
-    ):
-        return lot_size
-
-    return 1.0
-
-
-def _resolve_net_lot_for_display(
-    *,
-    row: pd.Series,
-    net_qty: float,
-    net_lot_col: Optional[str],
-    lot_size_col: Optional[str],
-) -> Optional[float]:
-    if net_lot_col:
-        net_lot = _to_float_or_none(row.get(net_lot_col))
-        if net_lot is not None:
-            return float(net_lot)
-
-    if lot_size_col:
-        lot_size = _to_float_or_none(row.get(lot_size_col))
-        if lot_size is not None and abs(lot_size) > 1e-9:
-            return float(net_qty) / float(lot_size)
+def _column_floats(df: pd.DataFrame, col: Optional[str]) -> np.ndarray:
+    """Numeric values of ``col`` as floats (NaN where missing or unparseable)."""
+    if not col:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _float_or_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
 
-    return None
 
+def _build_col_map(df: pd.DataFrame) -> Dict[str, str]:
+    return {_normalize_col_name(col): col for col in df.columns}
 
-def _find_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
-    normalized_map = {_normalize_col_name(col): col for col in df.columns}
+
+def _find_column(col_map: Dict[str, str], candidates: List[str]) -> Optional[str]:
     for candidate in candidates:
-        found = normalized_map.get(_normalize_col_name(candidate))
+        found = col_map.get(_normalize_col_name(candidate))
         if found:
             return found
     return None
 
 
+@lru_cache(maxsize=512, typed=True)
 def _normalize_col_name(value: object) -> str:
-    text = str(value or "").strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value or ""))
 
 
 def _as_str(value: object) -> str:
     return str(value or "").strip()
 
 
-def _extract_underlying_symbol(trading_symbol: object) -> str:
-    text = _as_str(trading_symbol).upper()
-    if not text:
-        return ""
-    return text.split()[0]
+def _underlying_symbols(trading_symbols: pd.Series) -> pd.Series:
+    """First whitespace-separated token of each upper-cased symbol ("" when blank)."""
+    return trading_symbols.str.upper().str.split(n=1).str[0].fillna("")
 
 
 def _normalize_manual_closes(
@@ -264,14 +284,14 @@ def _normalize_manual_closes(
     return normalized
 
 
-def _to_float(value: object) -> float:
-    numeric = pd.to_numeric(value, errors="coerce")
-    if pd.isna(numeric):
-        return 0.0
-    return float(numeric)
-
-
 def _to_float_or_none(value: object) -> Optional[float]:
+    if value is None:
+        return None
+    # build_manual_index_closes already yields floats, so those skip pandas dispatch;
+    # strings keep pd.to_numeric's parsing rules (float() would also accept "1_000").
+    if isinstance(value, (int, float)):
+        numeric = float(value)
+        return None if numeric != numeric else numeric
     numeric = pd.to_numeric(value, errors="coerce")
     if pd.isna(numeric):
         return None
@@ -1,10 +1,18 @@
+import asyncio
+import hashlib
 import io
 import json
+import re
+import threading
 import zipfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from fastapi import FastAPI, File, Form, Query, UploadFile
 from fastapi.responses import FileResponse, JSONResponse, Response
@@ -14,10 +22,13 @@ from pandas.errors import EmptyDataError, ParserError
 from app.admin_batch import (
     ACCOUNT_ID_SYNONYMS,
     USER_ID_SYNONYMS,
+    admin_batch_workers,
     extract_group_indices,
     find_column,
+    map_accounts,
     netwise_only_keys,
     resolve_group_columns,
+    shutdown_account_pool,
 )
 from app.charges import compute_charges
 from app.charges_edit import apply_user_edits, parse_json_list
@@ -47,7 +58,21 @@ BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
 INDEX_FILE = STATIC_DIR / "index.html"
 
-app = FastAPI()
+_UNSAFE_FILENAME_CHAR_PATTERN = re.compile(r"[^\w.-]")
+
+# Cleaned and validated upload frames keyed by (kind, sha1 of the raw bytes).
+_UPLOAD_CACHE_SIZE = 8
+_UPLOAD_CACHE: "OrderedDict[Tuple[str, bytes], pd.DataFrame]" = OrderedDict()
+_UPLOAD_CACHE_LOCK = threading.Lock()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    shutdown_account_pool()
+
+
+app = FastAPI(lifespan=_lifespan)
 
 # Serve files in app/static at /static.
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
@@ -113,25 +138,7 @@ async def generate(
             close_sensex=close_sensex,
             close_bankex=close_bankex,
         )
-        daywise_df = _read_upload_csv(daywise_file, "Day wise")
-        netwise_df = _read_upload_csv(netwise_file, "Net wise")
-
-        daywise_df = clean_df(daywise_df)
-        netwise_df = clean_df(netwise_df)
-
-        daywise_df = validate_csv_columns(
-            daywise_df, REQUIRED_COLUMNS, DAYWISE_SYNONYMS, "Daywise"
-        )
-        netwise_df = validate_csv_columns(
-            netwise_df, REQUIRED_COLUMNS, NETWISE_SYNONYMS, "Netwise"
-        )
-
-        buy_turnover = _numeric_sum(daywise_df, "Actual Buy Value")
-        sell_turnover = _numeric_sum(daywise_df, "Actual Sell Value")
-        net_amount = _numeric_sum(daywise_df, "Actual Mark To Market")
-
-        net_qty = pd.to_numeric(netwise_df["NetQty"], errors="coerce").fillna(0)
-        nonzero_netqty_rows = int((net_qty != 0).sum())
+        daywise_df, netwise_df = await _load_upload_pair(daywise_file, netwise_file)
 
         (
             netwise_for_closing,
@@ -176,6 +183,10 @@ async def generate(
         return JSONResponse(status_code=400, content={"error": str(exc)})
 
     if debug:
+        # These input summaries only feed the debug payload.
+        net_qty = pd.to_numeric(netwise_df["NetQty"], errors="coerce").to_numpy(
+            dtype=float, na_value=0.0
+        )
         response_payload = {
             "status": "parsed",
             "account": account,
@@ -183,14 +194,14 @@ async def generate(
             "daywise": {
                 "rows": int(daywise_df.shape[0]),
                 "columns": [str(col) for col in daywise_df.columns],
-                "buy_turnover": buy_turnover,
-                "sell_turnover": sell_turnover,
-                "net_amount": net_amount,
+                "buy_turnover": _numeric_sum(daywise_df, "Actual Buy Value"),
+                "sell_turnover": _numeric_sum(daywise_df, "Actual Sell Value"),
+                "net_amount": _numeric_sum(daywise_df, "Actual Mark To Market"),
             },
             "netwise": {
                 "rows": int(netwise_df.shape[0]),
                 "columns": [str(col) for col in netwise_df.columns],
-                "nonzero_netqty_rows": nonzero_netqty_rows,
+                "nonzero_netqty_rows": int(np.count_nonzero(net_qty)),
             },
             "positions": {"rows": positions_rows, "totals": positions_totals},
             "closing_positions": {
@@ -285,25 +296,18 @@ async def preview(
             close_sensex=close_sensex,
             close_bankex=close_bankex,
         )
-        daywise_df = _read_upload_csv(daywise_file, "Day wise")
-        netwise_df = _read_upload_csv(netwise_file, "Net wise")
-
-        daywise_df = clean_df(daywise_df)
-        netwise_df = clean_df(netwise_df)
-
-        daywise_df = validate_csv_columns(
-            daywise_df, REQUIRED_COLUMNS, DAYWISE_SYNONYMS, "Daywise"
-        )
-        netwise_df = validate_csv_columns(
-            netwise_df, REQUIRED_COLUMNS, NETWISE_SYNONYMS, "Netwise"
-        )
+        daywise_df, netwise_df = await _load_upload_pair(daywise_file, netwise_file)
 
         rate_card = get_rate_card()
-        _, _, expiry_settlement_total, _ = apply_expiry_settlement(
-            netwise_df,
-            bill_date,
-            manual_closes=manual_closes,
-        )
+        # Without manual closes every expiring option is pending, so the
+        # settlement total is 0 and the preview only needs that total.
+        expiry_settlement_total = 0.0
+        if manual_closes:
+            _, _, expiry_settlement_total, _ = apply_expiry_settlement(
+                netwise_df,
+                bill_date,
+                manual_closes=manual_closes,
+            )
         expiry_lot_fee, _ = compute_expiry_lot_fee(netwise_df, bill_date)
         charges, _ = compute_charges(
             daywise_df,
@@ -449,21 +453,24 @@ async def generate_admin(
     ordered_account_keys = sorted(day_groups.keys(), key=natural_pr_sort_key)
 
     with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        # clean_df renames columns and drops rows on their own values only, so one
+        # pass over the whole file matches cleaning every account slice. Clean on
+        # row positions to map each group's positions onto the surviving rows.
+        daywise_clean = clean_df(daywise_df.set_axis(pd.RangeIndex(len(daywise_df))))
+        kept_positions = daywise_clean.index.to_numpy()
+        daywise_clean = daywise_clean.set_axis(daywise_df.index.take(kept_positions))
+        clean_slots = np.full(len(daywise_df), -1, dtype=np.intp)
+        clean_slots[kept_positions] = np.arange(len(kept_positions))
+
+        account_jobs: Dict[str, tuple] = {}
         for key in ordered_account_keys:
-            day_sub_raw = daywise_df.loc[day_groups[key]]
-            day_subdf = clean_df(day_sub_raw)
+            slots = clean_slots[day_groups[key]]
+            day_subdf = daywise_clean.take(slots[slots >= 0])
             if day_subdf.empty:
-                manifest["failed"].append(
-                    {
-                        "key": key,
-                        "error": "No tradable rows after cleaning (TradingSymbol empty).",
-                    }
-                )
-                manifest["counts"]["accounts_empty_after_cleaning"] += 1
                 continue
             has_net_rows = key in net_groups
             if has_net_rows:
-                net_subdf = netwise_df.loc[net_groups[key]]
+                net_subdf = netwise_df.take(net_groups[key])
             else:
                 net_subdf = netwise_df.head(0).copy()
                 manifest["warnings"].append(
@@ -475,59 +482,43 @@ async def generate_admin(
                         ),
                     }
                 )
+            account_jobs[key] = (
+                key,
+                day_subdf,
+                net_subdf,
+                bill_date,
+                manual_closes,
+                rate_card,
+                trade_date,
+            )
 
-            try:
-                (
-                    net_subdf_for_closing,
-                    expiry_settlement_rows,
-                    expiry_settlement_total,
-                    expiry_pending_rows,
-                ) = apply_expiry_settlement(
-                    net_subdf,
-                    bill_date,
-                    manual_closes=manual_closes,
-                )
-                expiry_lot_fee, expiry_lot_fee_rows = compute_expiry_lot_fee(
-                    net_subdf,
-                    bill_date,
-                )
-                positions_rows, positions_totals = build_positions(day_subdf)
-                charges, _ = compute_charges(
-                    day_subdf,
-                    net_subdf,
-                    rate_card,
-                    expiry_settlement_total=expiry_settlement_total,
-                    expiry_lot_fee=expiry_lot_fee,
-                    debug=False,
-                )
-                context = build_pdf_context(
-                    account=key,
-                    trade_date=trade_date,
-                    daywise_df=day_subdf,
-                    positions_rows=positions_rows,
-                    positions_totals=positions_totals,
-                    charges=charges,
-                    expiry_settlement_rows=expiry_settlement_rows,
-                    expiry_pending_rows=expiry_pending_rows,
-                    expiry_settlement_total=expiry_settlement_total,
-                )
-                closing_rows, closing_total, closing_status = build_closing_positions(
-                    net_subdf_for_closing, trade_date
-                )
-                account_meta = {
-                    "account_code": key,
-                    "account_name": key,
-                    "trade_date": trade_date,
-                }
+        account_results = map_accounts(
+            _build_account_bill, account_jobs, admin_batch_workers()
+        )
 
-                bill_pdf_bytes = render_bill_pdf(context)
-                closing_pdf_bytes = render_closing_positions_pdf(
-                    account_meta,
-                    closing_rows,
-                    closing_total,
-                    closing_status,
+        for key in ordered_account_keys:
+            if key not in account_results:
+                manifest["failed"].append(
+                    {
+                        "key": key,
+                        "error": "No tradable rows after cleaning (TradingSymbol empty).",
+                    }
                 )
-                pdf_bytes = merge_pdf_documents([bill_pdf_bytes, closing_pdf_bytes])
+                manifest["counts"]["accounts_empty_after_cleaning"] += 1
+                continue
+
+            try:
+                result = account_results[key]
+                if isinstance(result, Exception):
+                    raise result
+                context = result["context"]
+                closing_rows = result["closing_rows"]
+                closing_total = result["closing_total"]
+                closing_status = result["closing_status"]
+                account_meta = result["account_meta"]
+                bill_pdf_bytes = result["bill_pdf_bytes"]
+                closing_pdf_bytes = result["closing_pdf_bytes"]
+                pdf_bytes = result["pdf_bytes"]
                 filename = _safe_pdf_filename(key, trade_date)
                 generated_account_files.append(
                     {
@@ -539,8 +530,8 @@ async def generate_admin(
                 manifest["success"].append({"key": key, "pdf": filename})
                 if debug:
                     manifest.setdefault("expiry_lot_fee_debug", {})[key] = {
-                        "total_fee": expiry_lot_fee,
-                        "rows": expiry_lot_fee_rows,
+                        "total_fee": result["expiry_lot_fee"],
+                        "rows": result["expiry_lot_fee_rows"],
                     }
                 manifest["counts"]["generated_pdfs"] += 1
                 accounts_bundle.append(
@@ -562,10 +553,8 @@ async def generate_admin(
         for key in netwise_only_keys(day_groups, net_groups):
             manifest["failed"].append({"key": key, "error": "Missing in daywise file."})
 
-        accounts_bundle = sorted(
-            accounts_bundle,
-            key=lambda item: natural_pr_sort_key(item.get("account_code", "")),
-        )
+        # accounts_bundle was filled in ordered_account_keys order, so it is
+        # already in natural PR order.
         consolidated_bytes = render_admin_consolidated_pdf(accounts_bundle, trade_date)
         consolidated_filename = f"Bill_Admin_{safe_trade_date}.pdf"
 
@@ -639,10 +628,84 @@ async def generate_admin(
 
         zip_file.writestr("manifest.json", json.dumps(manifest, indent=2))
 
-    zip_buffer.seek(0)
     zip_name = f"Bills_{safe_trade_date}.zip"
     headers = {"Content-Disposition": f'attachment; filename="{zip_name}"'}
-    return Response(content=zip_buffer.getvalue(), media_type="application/zip", headers=headers)
+    # getbuffer() shares the archive's memory instead of copying it like getvalue().
+    return Response(content=zip_buffer.getbuffer(), media_type="application/zip", headers=headers)
+
+
+def _build_account_bill(
+    key: str,
+    day_subdf: pd.DataFrame,
+    net_subdf: pd.DataFrame,
+    bill_date: date,
+    manual_closes: Dict[str, float],
+    rate_card: Dict,
+    trade_date: str,
+) -> Dict:
+    """Compute and render one account's bill and closing-positions PDFs for /generate-admin."""
+    (
+        net_subdf_for_closing,
+        expiry_settlement_rows,
+        expiry_settlement_total,
+        expiry_pending_rows,
+    ) = apply_expiry_settlement(
+        net_subdf,
+        bill_date,
+        manual_closes=manual_closes,
+    )
+    expiry_lot_fee, expiry_lot_fee_rows = compute_expiry_lot_fee(
+        net_subdf,
+        bill_date,
+    )
+    positions_rows, positions_totals = build_positions(day_subdf)
+    charges, _ = compute_charges(
+        day_subdf,
+        net_subdf,
+        rate_card,
+        expiry_settlement_total=expiry_settlement_total,
+        expiry_lot_fee=expiry_lot_fee,
+        debug=False,
+    )
+    closing_rows, closing_total, closing_status = build_closing_positions(
+        net_subdf_for_closing, trade_date
+    )
+    context = build_pdf_context(
+        account=key,
+        trade_date=trade_date,
+        daywise_df=day_subdf,
+        positions_rows=positions_rows,
+        positions_totals=positions_totals,
+        charges=charges,
+        expiry_settlement_rows=expiry_settlement_rows,
+        expiry_pending_rows=expiry_pending_rows,
+        expiry_settlement_total=expiry_settlement_total,
+    )
+    account_meta = {
+        "account_code": key,
+        "account_name": key,
+        "trade_date": trade_date,
+    }
+
+    bill_pdf_bytes = render_bill_pdf(context)
+    closing_pdf_bytes = render_closing_positions_pdf(
+        account_meta,
+        closing_rows,
+        closing_total,
+        closing_status,
+    )
+    return {
+        "expiry_lot_fee": expiry_lot_fee,
+        "expiry_lot_fee_rows": expiry_lot_fee_rows,
+        "context": context,
+        "account_meta": account_meta,
+        "closing_rows": closing_rows,
+        "closing_total": closing_total,
+        "closing_status": closing_status,
+        "bill_pdf_bytes": bill_pdf_bytes,
+        "closing_pdf_bytes": closing_pdf_bytes,
+        "pdf_bytes": merge_pdf_documents([bill_pdf_bytes, closing_pdf_bytes]),
+    }
 
 
 def _has_group_columns(df: pd.DataFrame) -> bool:
@@ -695,34 +758,90 @@ def _is_pr_account_pdf_name(filename: str) -> bool:
 
 
 def _sanitize_filename_part(value: str) -> str:
-    sanitized = "".join(
-        ch if ch.isalnum() or ch in {"-", "_", "."} else "_" for ch in value.strip()
-    )
+    # \w is exactly str.isalnum() plus "_", so this keeps the same characters.
+    sanitized = _UNSAFE_FILENAME_CHAR_PATTERN.sub("_", value.strip())
     return sanitized or "UNKNOWN"
 
 
+async def _load_upload_pair(
+    daywise_file: UploadFile, netwise_file: UploadFile
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read, clean and validate both uploads in worker threads, off the event loop."""
+    loaded = await asyncio.gather(
+        asyncio.to_thread(_load_upload_csv, daywise_file, "Day wise", "Daywise"),
+        asyncio.to_thread(_load_upload_csv, netwise_file, "Net wise", "Netwise"),
+        return_exceptions=True,
+    )
+    # Both files are read and cleaned before either is validated, daywise first at
+    # each step, so a read error in one file outranks a column error in the other.
+    for result in loaded:
+        if isinstance(result, BaseException):
+            raise result
+    daywise_loaded, netwise_loaded = loaded
+    return await asyncio.to_thread(
+        _validate_upload_pair, daywise_loaded, netwise_loaded
+    )
+
+
+def _load_upload_csv(
+    upload_file: UploadFile, label: str, kind: str
+) -> Tuple[tuple, pd.DataFrame, bool]:
+    """Return the upload's cache key, its frame and whether that came from the cache."""
+    # Bills are often regenerated from the same pair of files with a different
+    # account, date or closes, so reuse the validated frame for identical bytes.
+    cache_key = (kind, _upload_digest(upload_file, label))
+    with _UPLOAD_CACHE_LOCK:
+        cached = _UPLOAD_CACHE.get(cache_key)
+        if cached is not None:
+            _UPLOAD_CACHE.move_to_end(cache_key)
+    if cached is not None:
+        # pandas>=3 (pinned in requirements) makes shallow copies copy-on-write,
+        # so callers cannot alter the cached frame.
+        return cache_key, cached.copy(deep=False), True
+    return cache_key, clean_df(_read_upload_csv(upload_file, label)), False
+
+
+def _validate_upload_pair(
+    daywise_loaded: Tuple[tuple, pd.DataFrame, bool],
+    netwise_loaded: Tuple[tuple, pd.DataFrame, bool],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    daywise_df = _validate_upload(daywise_loaded, DAYWISE_SYNONYMS, "Daywise")
+    netwise_df = _validate_upload(netwise_loaded, NETWISE_SYNONYMS, "Netwise")
+    return daywise_df, netwise_df
+
+
+def _validate_upload(
+    loaded: Tuple[tuple, pd.DataFrame, bool],
+    synonyms: Dict[str, List[str]],
+    kind: str,
+) -> pd.DataFrame:
+    cache_key, df, cached = loaded
+    if cached:
+        return df
+
+    df = validate_csv_columns(df, REQUIRED_COLUMNS, synonyms, kind)
+    with _UPLOAD_CACHE_LOCK:
+        _UPLOAD_CACHE[cache_key] = df
+        while len(_UPLOAD_CACHE) > _UPLOAD_CACHE_SIZE:
+            _UPLOAD_CACHE.popitem(last=False)
+    return df.copy(deep=False)
+
+
 def _read_upload_csv(upload_file: UploadFile, label: str) -> pd.DataFrame:
     """Read an uploaded CSV into a DataFrame with safe decoding."""
-    try:
-        upload_file.file.seek(0)
-    except Exception:
-        pass
-
-    raw_bytes = upload_file.file.read()
-    if not raw_bytes:
-        raise ValueError(f"{label} CSV file is empty")
+    csv_file = _rewind_upload(upload_file, label)
 
+    # The C parser reads and decodes the spooled upload in chunks, so the file is
+    # never held whole as bytes or str; latin-1 accepts any byte and is the fallback.
     try:
-        text_data = raw_bytes.decode("utf-8")
+        df = pd.read_csv(csv_file, encoding="utf-8")
     except UnicodeDecodeError:
+        csv_file.seek(0)
         try:
-            text_data = raw_bytes.decode("latin-1")
-        except UnicodeDecodeError:
-            raise ValueError(f"{label} CSV file could not be decoded") from None
-
-    try:
-        df = pd.read_csv(io.StringIO(text_data))
-    except (EmptyDataError, ParserError, UnicodeDecodeError, ValueError):
+            df = pd.read_csv(csv_file, encoding="latin-1")
+        except (EmptyDataError, ParserError, UnicodeDecodeError, ValueError):
+            raise ValueError(f"{label} CSV could not be parsed") from None
+    except (EmptyDataError, ParserError, ValueError):
         raise ValueError(f"{label} CSV could not be parsed") from None
 
     if df.empty and len(df.columns) == 0:
@@ -731,21 +850,43 @@ def _read_upload_csv(upload_file: UploadFile, label: str) -> pd.DataFrame:
     return df
 
 
+def _rewind_upload(upload_file: UploadFile, label: str) -> BinaryIO:
+    csv_file = upload_file.file
+    try:
+        csv_file.seek(0)
+    except Exception:
+        pass
+
+    if not csv_file.read(1):
+        raise ValueError(f"{label} CSV file is empty")
+    csv_file.seek(0)
+    return csv_file
+
+
+def _upload_digest(upload_file: UploadFile, label: str) -> bytes:
+    return hashlib.file_digest(_rewind_upload(upload_file, label), "sha1").digest()
+
+
 def _drop_unnamed_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df.loc[:, [col for col in df.columns if not str(col).startswith("Unnamed:")]]
 
 
 def _numeric_sum(df: pd.DataFrame, column: str) -> float:
     """Sum a column after coercing non-numeric values to 0."""
-    series = pd.to_numeric(df[column], errors="coerce").fillna(0)
-    return float(series.sum())
+    # sum() skips NaN already, so unparseable cells count as 0 without a fillna copy.
+    return float(pd.to_numeric(df[column], errors="coerce").sum())
 
 
 def _parse_trade_date(value: str) -> date:
     text = str(value or "").strip()
     if not text:
         raise ValueError("trade_date is required")
+    return _parse_trade_date_text(text)
+
 
+@lru_cache(maxsize=256)
+def _parse_trade_date_text(text: str) -> date:
+    # Operators submit the same trade date across a day's uploads.
     for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y"):
         try:
             return datetime.strptime(text, fmt).date()
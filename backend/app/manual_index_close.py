@@ -3,6 +3,7 @@ from __future__ import annotations
 import math
 from typing import Dict, Optional
 
+# Keys are already the upper-case underlying symbols used in TradingSymbol.
 INDEX_FIELD_MAP: Dict[str, str] = {
     "NIFTY": "close_nifty",
     "BANKNIFTY": "close_banknifty",
@@ -36,6 +37,6 @@ def build_manual_index_closes(**fields: Optional[str]) -> Dict[str, float]:
         if not math.isfinite(value):
             raise ValueError(f"Invalid close for {symbol}")
 
-        closes[symbol.upper()] = value
+        closes[symbol] = value
 
     return closes
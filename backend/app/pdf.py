@@ -14,6 +14,48 @@ from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, Tabl
 from app.charges import normalize_segment
 from app.utils_sort import natural_pr_sort_key
 
+# Expense lines print in this order, under these labels, ahead of any other lines.
+_EXPENSE_LABELS = {
+    "SGST_9": "SGST",
+    "CGST_9": "CGST",
+    "SEBI": "SEBI FEES",
+    "CLEARING": "CLEARING CHARGES",
+    "STAMP_DUTY": "STAMPDUTY",
+    "TOC_NSE": "TOC NSE Exchange",
+    "TOC_BSE": "TOC BSE Exchange",
+    "STT": "STT",
+}
+
+# Paragraph styles are only read while rendering, so bills share one instance each.
+_BILL_TITLE_STYLE = ParagraphStyle(
+    "bill-title",
+    parent=getSampleStyleSheet()["Title"],
+    fontName="Helvetica-Bold",
+    fontSize=13,
+    alignment=1,
+    spaceAfter=4,
+)
+_META_STYLE = ParagraphStyle(
+    "meta",
+    fontName="Helvetica",
+    fontSize=9,
+    leading=11,
+)
+_SECTION_HEADING_STYLE = ParagraphStyle(
+    "section-heading",
+    fontName="Helvetica-Bold",
+    fontSize=9,
+    leading=11,
+    spaceAfter=3,
+)
+_ACTION_STATUS_STYLE = ParagraphStyle(
+    "action-status-cell",
+    fontName="Helvetica",
+    fontSize=6.8,
+    leading=7.6,
+    wordWrap="CJK",
+)
+
 
 def render_bill_pdf(context: Dict) -> bytes:
     buffer = io.BytesIO()
@@ -26,17 +68,7 @@ def render_bill_pdf(context: Dict) -> bytes:
         bottomMargin=14 * mm,
     )
 
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "bill-title",
-        parent=styles["Title"],
-        fontName="Helvetica-Bold",
-        fontSize=13,
-        alignment=1,
-        spaceAfter=4,
-    )
-
-    elements: List = [Paragraph("Bill Summary Report", title_style)]
+    elements: List = [Paragraph("Bill Summary Report", _BILL_TITLE_STYLE)]
 
     meta_table = _build_meta_table(context, doc.width)
     elements.append(meta_table)
@@ -300,9 +332,7 @@ def merge_pdf_documents(pdf_documents: Sequence[bytes]) -> bytes:
     for pdf_bytes in pdf_documents:
         if not pdf_bytes:
             continue
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        for page in reader.pages:
-            writer.add_page(page)
+        writer.append(PdfReader(io.BytesIO(pdf_bytes)), import_outline=False)
 
     output = io.BytesIO()
     if len(writer.pages) == 0:
@@ -345,12 +375,15 @@ def render_admin_consolidated_pdf(accounts_bundle: List[Dict], trade_date: str)
         if not closing_rows:
             # For ADMIN combined PDF, empty closing sections should read as no open positions.
             closing_status = "NO_OPEN_POSITIONS"
-        closing_pdf = render_closing_positions_pdf(
-            account_meta,
-            closing_rows,
-            closing_total,
-            closing_status,
-        )
+        closing_pdf = account.get("closing_pdf_bytes")
+        # The per-account closing PDF can be reused unless the status was rewritten above.
+        if not closing_pdf or closing_status != account.get("closing_status"):
+            closing_pdf = render_closing_positions_pdf(
+                account_meta,
+                closing_rows,
+                closing_total,
+                closing_status,
+            )
         ordered_parts.append(closing_pdf)
 
     return merge_pdf_documents(ordered_parts)
@@ -452,19 +485,13 @@ def build_pdf_context(
 
     expense_rows = []
     expense_map = {line.get("code"): line for line in charges.get("bill_lines", [])}
-    ordered_codes = [
-        "SGST_9",
-        "CGST_9",
-        "SEBI",
-        "CLEARING",
-        "STAMP_DUTY",
-        "TOC_NSE",
-        "TOC_BSE",
-        "STT",
+    ordered_lines = [
+        expense_map.get(code) for code in _EXPENSE_LABELS if code in expense_map
     ]
-    ordered_lines = [expense_map.get(code) for code in ordered_codes if code in expense_map]
     ordered_lines += [
-        line for line in charges.get("bill_lines", []) if line.get("code") not in ordered_codes
+        line
+        for line in charges.get("bill_lines", [])
+        if line.get("code") not in _EXPENSE_LABELS
     ]
 
     for idx, line in enumerate(ordered_lines, start=1):
@@ -504,12 +531,7 @@ def build_pdf_context(
 
 
 def _build_meta_table(context: Dict, width: float) -> Table:
-    style = ParagraphStyle(
-        "meta",
-        fontName="Helvetica",
-        fontSize=9,
-        leading=11,
-    )
+    style = _META_STYLE
     data = [
         [
             Paragraph(f"<b>Code</b> : {context.get('code', '')}", style),
@@ -537,14 +559,7 @@ def _build_meta_table(context: Dict, width: float) -> Table:
 
 
 def _build_section_heading(text: str) -> Paragraph:
-    style = ParagraphStyle(
-        "section-heading",
-        fontName="Helvetica-Bold",
-        fontSize=9,
-        leading=11,
-        spaceAfter=3,
-    )
-    return Paragraph(text, style)
+    return Paragraph(text, _SECTION_HEADING_STYLE)
 
 
 def _build_expiry_settlement_table(
@@ -554,14 +569,6 @@ def _build_expiry_settlement_table(
     include_total: bool,
     total_amount: float,
 ) -> Table:
-    action_status_style = ParagraphStyle(
-        "action-status-cell",
-        fontName="Helvetica",
-        fontSize=6.8,
-        leading=7.6,
-        wordWrap="CJK",
-    )
-
     headers = [
         "Trading Symbol",
         "Net Lot",
@@ -587,7 +594,7 @@ def _build_expiry_settlement_table(
                     _format_action_status(
                         row.get("action_status", row.get("status", ""))
                     ),
-                    action_status_style,
+                    _ACTION_STATUS_STYLE,
                 ),
                 _format_amount(row.get("settlement_amount", 0.0), 2),
             ]
@@ -1026,14 +1033,4 @@ class _NumberedCanvas(canvas.Canvas):
 
 
 def _display_label(code: object, fallback: str) -> str:
-    label_map = {
-        "SGST_9": "SGST",
-        "CGST_9": "CGST",
-        "SEBI": "SEBI FEES",
-        "CLEARING": "CLEARING CHARGES",
-        "STAMP_DUTY": "STAMPDUTY",
-        "TOC_NSE": "TOC NSE Exchange",
-        "TOC_BSE": "TOC BSE Exchange",
-        "STT": "STT",
-    }
-    return label_map.get(str(code), fallback)
+    return _EXPENSE_LABELS.get(str(code), fallback)
@@ -11,6 +11,8 @@ class RateCardError(ValueError):
 
 
 _RATE_CARD_CACHE: Optional[Dict] = None
+_NUMBER_PATTERN = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+_NON_KEY_CHARS_PATTERN = re.compile(r"[^A-Z0-9]+")
 
 
 def get_rate_card() -> Dict:
@@ -161,7 +163,7 @@ def parse_rate(value: object) -> float:
         return float(value)
 
     text = str(value)
-    match = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", text.replace(",", ""))
+    match = _NUMBER_PATTERN.search(text.replace(",", ""))
     if match:
         return float(match.group(0))
     return 0.0
@@ -196,8 +198,8 @@ def _normalize_gst(value: object) -> bool:
 
 
 def _make_key(label: str) -> str:
-    key = re.sub(r"[^A-Z0-9]+", "_", label.strip().upper())
-    key = re.sub(r"_+", "_", key).strip("_")
+    # "_" is itself outside [A-Z0-9], so each run collapses to a single "_".
+    key = _NON_KEY_CHARS_PATTERN.sub("_", label.strip().upper()).strip("_")
     return key or "UNKNOWN"
 
 
@@ -213,7 +215,7 @@ def _looks_numeric(label: str) -> bool:
     text = label.strip()
     if not text:
         return False
-    if re.fullmatch(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", text) is None:
+    if _NUMBER_PATTERN.fullmatch(text) is None:
         return False
     try:
         float(text)
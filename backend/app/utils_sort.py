@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Iterable, List, Optional, Tuple
 
 
@@ -23,7 +24,12 @@ def extract_pr_number(value: object) -> Optional[int]:
 
 
 def natural_pr_sort_key(value: object) -> Tuple[int, int, str]:
-    text = str(value or "").strip()
+    return _natural_pr_sort_key_text(str(value or "").strip())
+
+
+@lru_cache(maxsize=4096)
+def _natural_pr_sort_key_text(text: str) -> Tuple[int, int, str]:
+    # Admin runs sort the same account codes and filenames several times.
     lower = text.lower()
     pr_number = extract_pr_number(text)
 
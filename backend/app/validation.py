@@ -1,6 +1,7 @@
-import re
 from typing import Dict, Iterable
 
+from app.df_utils import alnum_lower
+
 REQUIRED_COLUMNS = [
     "TradingSymbol",
     "Exchg.Seg",
@@ -81,8 +82,7 @@ NETWISE_SYNONYMS = DAYWISE_SYNONYMS
 
 
 def _canonicalize_header(value: object) -> str:
-    text = str(value).strip().lower()
-    return re.sub(r"[^a-z0-9]", "", text)
+    return alnum_lower(str(value))
 
 
 def normalize_columns(df, synonyms_map: Dict[str, Iterable[str]]):
@@ -1,6 +1,17 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
 import pandas as pd
 
-from app.admin_batch import extract_group_indices, netwise_only_keys, resolve_group_columns
+from app import admin_batch
+from app.admin_batch import (
+    admin_batch_workers,
+    extract_group_indices,
+    map_accounts,
+    netwise_only_keys,
+    resolve_group_columns,
+    shutdown_account_pool,
+)
 from app.positions import clean_df
 
 
@@ -151,7 +162,7 @@ def test_group_then_clean_can_drop_account_rows():
     )
 
     assert set(day_groups.keys()) == {"A1", "A2", "A3"}
-    a2_clean = clean_df(day_df.loc[day_groups["A2"]])
+    a2_clean = clean_df(day_df.take(day_groups["A2"]))
     assert a2_clean.empty
 
 
@@ -184,3 +195,84 @@ def test_extract_group_indices_allows_empty_netwise_without_group_columns():
     assert net_groups == {}
     assert day_missing == 0
     assert net_missing == 0
+
+
+def test_group_indices_are_row_positions_in_row_order():
+    day_df = pd.DataFrame(
+        {"Account Id": ["A1", "A2", "A1", "", "A2"]},
+        index=[40, 10, 30, 20, 5],
+    )
+    net_df = pd.DataFrame()
+
+    info = resolve_group_columns(day_df, net_df)
+    day_groups, _, day_missing, _ = extract_group_indices(
+        day_df,
+        net_df,
+        info["group_key"],
+        info["day_account_col"],
+        info["day_user_col"],
+        info["net_account_col"],
+        info["net_user_col"],
+    )
+
+    assert list(day_groups["A1"]) == [0, 2]
+    assert list(day_groups["A2"]) == [1, 4]
+    assert day_missing == 1
+    assert list(day_df.take(day_groups["A2"]).index) == [10, 5]
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator
+
+
+def _exit_worker(code):
+    os._exit(code)
+
+
+def test_map_accounts_returns_failures_per_key():
+    jobs = {"A1": (6, 3), "A2": (1, 0), "A3": (5, 2)}
+
+    results = map_accounts(_ratio, jobs)
+    assert list(results) == ["A1", "A2", "A3"]
+    assert results["A1"] == 2
+    assert isinstance(results["A2"], ZeroDivisionError)
+    assert results["A3"] == 2.5
+
+    pooled = map_accounts(_ratio, jobs, max_workers=2)
+    assert pooled["A1"] == 2 and pooled["A3"] == 2.5
+    assert isinstance(pooled["A2"], ZeroDivisionError)
+
+
+def test_map_accounts_reuses_worker_pool():
+    jobs = {"A1": (6, 3), "A2": (5, 2)}
+    try:
+        map_accounts(_ratio, jobs, max_workers=2)
+        pool = admin_batch._ACCOUNT_POOL
+        assert pool is not None
+        map_accounts(_ratio, jobs, max_workers=2)
+        assert admin_batch._ACCOUNT_POOL is pool
+    finally:
+        shutdown_account_pool()
+    assert admin_batch._ACCOUNT_POOL is None
+
+
+def test_map_accounts_reports_dead_workers_per_key():
+    try:
+        results = map_accounts(_exit_worker, {"A1": (1,), "A2": (1,)}, max_workers=2)
+        assert list(results) == ["A1", "A2"]
+        assert all(isinstance(result, BrokenProcessPool) for result in results.values())
+        assert admin_batch._ACCOUNT_POOL is None
+
+        pooled = map_accounts(_ratio, {"A1": (6, 3), "A2": (5, 2)}, max_workers=2)
+        assert pooled == {"A1": 2, "A2": 2.5}
+    finally:
+        shutdown_account_pool()
+
+
+def test_admin_batch_workers_defaults_to_sequential(monkeypatch):
+    monkeypatch.delenv("ADMIN_BATCH_WORKERS", raising=False)
+    assert admin_batch_workers() == 1
+    monkeypatch.setenv("ADMIN_BATCH_WORKERS", "3")
+    assert admin_batch_workers() == 3
+    monkeypatch.setenv("ADMIN_BATCH_WORKERS", "many")
+    assert admin_batch_workers() == 1
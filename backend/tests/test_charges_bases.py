@@ -0,0 +1,128 @@
+import pandas as pd
+
+from app.charges import _compute_assignment_stt, _compute_turnover_bases
+
+
+def test_turnover_bases_split_by_segment_and_instrument():
+    day_df = pd.DataFrame(
+        [
+            {
+                "Exchg.Seg": "NFO",
+                "TradingSymbol": "NIFTY 12FEB2026 CE 22000",
+                "Actual Buy Value": 100.0,
+                "Actual Sell Value": 40.0,
+            },
+            {
+                "Exchg.Seg": " bsefo ",
+                "TradingSymbol": "SENSEX 12FEB2026 PE 82000",
+                "Actual Buy Value": "25",
+                "Actual Sell Value": "bad",
+            },
+            {
+                "Exchg.Seg": "NSEFO",
+                "TradingSymbol": "NIFTY 26FEB2026 FUT",
+                "Actual Buy Value": 1000.0,
+                "Actual Sell Value": 500.0,
+            },
+        ]
+    )
+
+    segment_bases, _, defaults, instrument_debug = _compute_turnover_bases(
+        day_df, debug=True
+    )
+
+    assert segment_bases["NFO"] == {
+        "futures_buy": 1000.0,
+        "futures_sell": 500.0,
+        "options_buy": 100.0,
+        "options_sell": 40.0,
+    }
+    assert segment_bases["BFO"]["options_buy"] == 25.0
+    assert segment_bases["BFO"]["options_sell"] == 0.0
+    assert instrument_debug["options"] == 2
+    assert instrument_debug["futures"] == 1
+    assert defaults["count"] == 0
+
+
+def test_turnover_bases_default_blank_segment_to_nfo():
+    day_df = pd.DataFrame(
+        {
+            "Exchg.Seg": ["", None, "MCX"],
+            "TradingSymbol": ["A FUT", "B FUT", "C FUT"],
+            "Actual Buy Value": [1.0, 2.0, 3.0],
+            "Actual Sell Value": [0.0, 0.0, 0.0],
+        },
+        index=[10, 11, 12],
+    )
+
+    segment_bases, _, defaults, _ = _compute_turnover_bases(day_df, debug=True)
+
+    assert segment_bases["NFO"]["futures_buy"] == 6.0
+    assert defaults["count"] == 3
+    assert [row["row_index"] for row in defaults["rows"]] == [10, 11, 12]
+    assert defaults["rows"][2]["segment_raw"] == "MCX"
+
+    quiet_bases, turnover_bases, quiet_defaults, _ = _compute_turnover_bases(day_df)
+    assert quiet_bases == segment_bases
+    assert turnover_bases == {} and quiet_defaults == {}
+
+
+def test_assignment_stt_charges_only_exercised_options():
+    rules_map = {
+        "NSE_STT": {"rates": {"assignment": 0.125}},
+        "BSE_STT": {"rates": {"assignment": 0.1}},
+    }
+    net_df = pd.DataFrame(
+        [
+            {
+                "Exchg.Seg": "NFO",
+                "TradingSymbol": "NIFTY 12FEB2026 CE 22000",
+                "NetQty": 50,
+                "SettlementType": "EXERCISE",
+                "Actual Buy Value": 0.0,
+                "Actual Sell Value": 0.0,
+                "LastTradePrice": 20.0,
+            },
+            {
+                "Exchg.Seg": "BFO",
+                "TradingSymbol": "SENSEX 12FEB2026 PE 82000",
+                "NetQty": -10,
+                "Square Off Context": "ASSIGNED",
+                "Actual Buy Value": 400.0,
+                "Actual Sell Value": 600.0,
+                "LastTradePrice": 5.0,
+            },
+            {
+                "Exchg.Seg": "NFO",
+                "TradingSymbol": "NIFTY 26FEB2026 FUT",
+                "NetQty": 75,
+                "SettlementType": "EXE",
+                "Actual Buy Value": 1000.0,
+                "Actual Sell Value": 0.0,
+                "LastTradePrice": 1.0,
+            },
+            {
+                "Exchg.Seg": "NFO",
+                "TradingSymbol": "NIFTY 12FEB2026 PE 21000",
+                "NetQty": 0,
+                "SettlementType": "EXE",
+                "Actual Buy Value": 1000.0,
+                "Actual Sell Value": 0.0,
+                "LastTradePrice": 1.0,
+            },
+        ]
+    )
+
+    result = _compute_assignment_stt(net_df, rules_map, debug=True)
+
+    assert result["nfo_amount"] == 50 * 20.0 * 0.00125
+    assert result["bfo_amount"] == 1000.0 * 0.001
+    assert [row["qualifies"] for row in result["candidates"]] == [True, True, False]
+    assert [row["trading_symbol"] for row in result["charged"]] == [
+        "NIFTY 12FEB2026 CE 22000",
+        "SENSEX 12FEB2026 PE 82000",
+    ]
+
+    quiet = _compute_assignment_stt(net_df, rules_map)
+    assert quiet["nfo_amount"] == result["nfo_amount"]
+    assert quiet["candidates"] == []
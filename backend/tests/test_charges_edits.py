@@ -112,3 +112,23 @@ def test_whitespace_collapse_for_label():
         additions=[{"name": "Software   Charges", "amount": 10}],
     )
     assert updated["bill_lines"][-1]["label"] == "Software Charges"
+
+
+def test_edits_do_not_mutate_input_charges():
+    charges = _base_charges()
+    original_lines = [dict(line) for line in charges["bill_lines"]]
+    updated = apply_user_edits(
+        charges,
+        overrides=[{"code": "TOC_NSE", "amount": 200}],
+        additions=[{"name": "Interest", "amount": 12.5, "gst_applicable": True}],
+    )
+    assert charges["bill_lines"] == original_lines
+    assert updated["bill_lines"][0]["amount"] == -200
+    assert len(updated["bill_lines"]) == len(original_lines) + 1
+
+
+def test_no_edits_keeps_computed_totals():
+    charges = _base_charges()
+    updated = apply_user_edits(charges, overrides=[], additions=None)
+    assert updated == charges
+    assert updated is not charges
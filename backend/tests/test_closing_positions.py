@@ -99,3 +99,21 @@ def test_build_closing_positions_safe_default_for_uncertain_expiry() -> None:
     assert status == "OK"
     assert len(rows) == 1
     assert round(total_value, 2) == 100.0
+
+
+def test_build_closing_positions_prefers_first_non_zero_price_column() -> None:
+    net_df = pd.DataFrame(
+        {
+            "TradingSymbol": ["A FUT", "B FUT", "C FUT"],
+            "NetQty": ["2", 1.4, -3],
+            "LastTradePrice": [0.0, None, "bad"],
+            "ClosePrice": [12.5, 0.0, None],
+        }
+    )
+
+    rows, total_value, status = build_closing_positions(net_df, "")
+
+    assert status == "OK"
+    assert [row["net_qty"] for row in rows] == [2, 1, -3]
+    assert [row["ltp"] for row in rows] == [12.5, 0.0, 0.0]
+    assert total_value == 25.0
@@ -2,7 +2,7 @@ from datetime import date
 
 import pandas as pd
 
-from app.expiry_settlement import apply_expiry_settlement, parse_expiry
+from app.expiry_settlement import apply_expiry_settlement, expiring_on, parse_expiry
 
 
 def test_parse_expiry_dd_mmm_yyyy() -> None:
@@ -178,3 +178,14 @@ def test_settlement_row_includes_net_lot_with_lotsize_fallback() -> None:
     assert len(settlement_rows) == 1
     assert settlement_rows[0]["net_lot"] == 3.0
     assert settlement_total == 15000.0
+
+
+def test_expiring_on_matches_parse_expiry() -> None:
+    values = pd.Series(
+        ["12Feb2026", " 12 feb 2026 ", "12Feb26", "12-Feb-2026", "13Feb2026", None, "31Feb2026"]
+    )
+
+    mask = expiring_on(values, date(2026, 2, 12))
+
+    assert mask.tolist() == [True, True, False, False, False, False, False]
+    assert mask.tolist() == (values.map(parse_expiry) == date(2026, 2, 12)).tolist()
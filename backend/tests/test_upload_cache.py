@@ -0,0 +1,55 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app import main as main_module
+from app.validation import DAYWISE_SYNONYMS
+
+DAYWISE_CSV = b"""TradingSymbol,Exchg.Seg,BuyQty,SellQty,NetQty,BuyAvgPrice,SellAvgPrice,Actual Buy Value,Actual Sell Value,Actual Mark To Market
+NIFTY 26FEB2026 FUT,NFO,75,0,75,22000,0,1650000,0,0
+"""
+
+
+def _upload(payload: bytes) -> UploadFile:
+    return UploadFile(filename="daywise.csv", file=io.BytesIO(payload))
+
+
+def _load_daywise(payload: bytes):
+    loaded = main_module._load_upload_csv(_upload(payload), "Day wise", "Daywise")
+    return main_module._validate_upload(loaded, DAYWISE_SYNONYMS, "Daywise")
+
+
+def test_identical_uploads_reuse_cleaned_frame(monkeypatch):
+    monkeypatch.setattr(main_module, "_UPLOAD_CACHE", main_module.OrderedDict())
+    parsed = []
+    original_read = main_module._read_upload_csv
+
+    def _counting_read(upload_file, label):
+        parsed.append(label)
+        return original_read(upload_file, label)
+
+    monkeypatch.setattr(main_module, "_read_upload_csv", _counting_read)
+
+    first = _load_daywise(DAYWISE_CSV)
+    first["NetQty"] = 0
+    second = _load_daywise(DAYWISE_CSV)
+
+    assert parsed == ["Day wise"]
+    assert second["NetQty"].tolist() == [75]
+
+    _load_daywise(DAYWISE_CSV.replace(b"75,0,75", b"50,0,50"))
+    assert parsed == ["Day wise", "Day wise"]
+
+
+def test_read_errors_outrank_column_errors(monkeypatch):
+    monkeypatch.setattr(main_module, "_UPLOAD_CACHE", main_module.OrderedDict())
+    daywise_missing_column = DAYWISE_CSV.replace(b"Actual Mark To Market", b"MTM")
+
+    with pytest.raises(ValueError, match="Net wise CSV file is empty"):
+        asyncio.run(
+            main_module._load_upload_pair(
+                _upload(daywise_missing_column), _upload(b"")
+            )
+        )